@@ -0,0 +1,204 @@
+"""
+End-to-end benchmark of Simulation
+
+Runs the simulator for every strategy pair over a load grid, with the node counts of run_simulation.py's
+rho2urllc / rho2mmtc, and over a scaling grid of mMTC node counts from 10 to 1M. RR_NQ only schedules the
+URLLC slice. The event queue grid runs FCFS over the node counts of the scaling grid, for a longer time, with
+every event queue backend, and reports the node count from which the calendar queue is faster than the heap.
+Every run gets a fresh worker process, whose peak RSS is read from the high-water mark of its own address space.
+Run from the repository root:
+
+    python3 -m benchmarks.end_to_end [--quick]
+"""
+
+import argparse
+import json
+import multiprocessing
+import resource
+import time
+import numpy as np
+from utilities.stats import Stats
+from utilities.trace import Trace, next_prime
+from utilities.random_streams import RandomStreams
+from simulation import Simulation
+
+STRATEGIES = ['FCFS', 'RR_Q', 'RR_NQ']
+# RR_NQ only schedules the URLLC slice
+MMTC_STRATEGIES = ['FCFS', 'RR_Q']
+EVENT_QUEUES = ['heap', 'calendar']
+LOADS = [0.1, 0.5, 1.0, 1.5]
+NODE_COUNTS = [10, 100, 1000, 10000, 100000, 1000000]
+# URLLC nodes of the scaling grid, rho2urllc(0.5) with the short deadline
+SCALING_URLLC = 12
+LOAD_LENGTH = 200
+SCALING_LENGTH = 20
+# Long enough for the event loop, not the initial push of the arrivals, to dominate the wall time
+EVENT_QUEUE_LENGTH = 200
+SEED = 1
+
+# Same as run_simulation.py, low reliability, short deadline
+TOTAL_PILOTS = 12
+SLOT_TIME = 0.5
+URLLC_PERIOD = 1
+URLLC_PILOT = 1
+MMTC_PERIOD = 50
+MMTC_PILOT = 1
+
+
+def rho2urllc(rho):
+    return int(round(rho * TOTAL_PILOTS * URLLC_PERIOD / (URLLC_PILOT * SLOT_TIME)))
+
+
+def rho2mmtc(rho):
+    return int(round(rho * TOTAL_PILOTS * MMTC_PERIOD / (MMTC_PILOT * SLOT_TIME)))
+
+
+def get_peak_rss_mb():
+    """
+    Peak RSS of the current process in MB
+
+    ru_maxrss is inherited across the fork and exec that start a spawned worker, so it reports the peak of the
+    parent if that is higher. VmHWM is the high-water mark of the address space, which exec replaces, so it only
+    covers the worker. ru_maxrss is the fallback where /proc is not available.
+    """
+    try:
+        with open('/proc/self/status') as status:
+            for line in status:
+                if line.startswith('VmHWM:'):
+                    # In kB
+                    return int(line.split()[1]) / 1024.
+    except OSError:
+        pass
+    # ru_maxrss is in kB on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.
+
+
+def run_case(case):
+    """
+    Run one simulation in the current process
+
+    Returns
+    -------
+    dict
+        The case with its wall time, number of events, events per second and the peak RSS of the process in MB
+    """
+    with open('default_config.json') as config_file:
+        config = json.load(config_file)
+    config['simulation_length'] = case['length']
+    config['event_queue'] = case['event_queue']
+    config['run_cache'] = None
+    streams = RandomStreams(SEED)
+    stats = Stats(None)
+    trace = Trace(None, next_prime(case['no_urllc']), rng=streams.sampling)
+    start = time.perf_counter()
+    simulation = Simulation(config, stats, trace, case['no_urllc'], case['no_mmtc'], 2.26, case['s1'], case['s2'],
+                            ('low', 'short'), streams)
+    setup = time.perf_counter()
+    simulation.run()
+    trace.process()
+    end = time.perf_counter()
+    result = dict(case)
+    result['setup_time'] = setup - start
+    result['wall_time'] = end - start
+    result['no_events'] = simulation.no_events
+    result['events_per_sec'] = simulation.no_events / (end - setup) if end > setup else 0.0
+    result['peak_rss_mb'] = get_peak_rss_mb()
+    return result
+
+
+def get_cases(quick=False):
+    """ Cases of the load and the scaling grids """
+    strategies = STRATEGIES
+    pairs = [(s1, s2) for s1 in strategies for s2 in MMTC_STRATEGIES]
+    loads = LOADS
+    node_counts = NODE_COUNTS
+    if quick:
+        pairs = [(s1, 'FCFS') for s1 in strategies]
+        loads = LOADS[1:3]
+        node_counts = [count for count in NODE_COUNTS if count <= 10000]
+    cases = []
+    for s1, s2 in pairs:
+        for load in loads:
+            cases.append({'grid': 'load', 's1': s1, 's2': s2, 'event_queue': 'heap', 'load': load,
+                          'no_urllc': rho2urllc(load), 'no_mmtc': rho2mmtc(load), 'length': LOAD_LENGTH})
+        for no_mmtc in node_counts:
+            cases.append({'grid': 'scaling', 's1': s1, 's2': s2, 'event_queue': 'heap', 'load': None,
+                          'no_urllc': SCALING_URLLC, 'no_mmtc': no_mmtc, 'length': SCALING_LENGTH})
+    for no_mmtc in node_counts:
+        for event_queue in EVENT_QUEUES:
+            cases.append({'grid': 'event_queue', 's1': 'FCFS', 's2': 'FCFS', 'event_queue': event_queue,
+                          'load': None, 'no_urllc': SCALING_URLLC, 'no_mmtc': no_mmtc,
+                          'length': EVENT_QUEUE_LENGTH})
+    return cases
+
+
+def get_scaling_exponents(results):
+    """
+    Exponent b of wall_time ~ nodes^b of every strategy pair, fitted in log-log space on the scaling grid
+
+    Returns
+    -------
+    dict
+        "<s1>-<s2>" -> exponent
+    """
+    exponents = {}
+    for s1 in STRATEGIES:
+        for s2 in MMTC_STRATEGIES:
+            points = [(result['no_mmtc'], result['wall_time']) for result in results
+                      if result['grid'] == 'scaling' and result['s1'] == s1 and result['s2'] == s2]
+            if len(points) < 2:
+                continue
+            nodes, wall_time = np.array(points, dtype=float).T
+            exponents[s1 + '-' + s2] = float(np.polyfit(np.log(nodes), np.log(wall_time), 1)[0])
+    return exponents
+
+
+def get_crossover(results):
+    """
+    Smallest mMTC node count of the event queue grid from which the calendar queue is faster than the heap at
+    every larger node count, None if it is not faster at the largest one
+    """
+    wall_times = {}
+    for result in results:
+        if result['grid'] == 'event_queue':
+            wall_times.setdefault(result['no_mmtc'], {})[result['event_queue']] = result['wall_time']
+    crossover = None
+    for no_mmtc in sorted(wall_times, reverse=True):
+        times = wall_times[no_mmtc]
+        if len(times) < len(EVENT_QUEUES) or times['calendar'] >= times['heap']:
+            break
+        crossover = no_mmtc
+    return crossover
+
+
+def run(quick=False, callback=None):
+    """ Run all the cases, each in a fresh worker process, and returns their results """
+    results = []
+    # Spawned, not forked, so the worker does not share the pages of the parent, see get_peak_rss_mb
+    with multiprocessing.get_context('spawn').Pool(1, maxtasksperchild=1) as pool:
+        for result in pool.imap(run_case, get_cases(quick)):
+            results.append(result)
+            if callback is not None:
+                callback(result)
+    return results
+
+
+def print_result(result):
+    print("{},{},{},{},{},{},{},{:.3f},{},{:.0f},{:.1f}".format(
+        result['grid'], result['s1'], result['s2'], result['event_queue'], result['load'], result['no_urllc'],
+        result['no_mmtc'], result['wall_time'], result['no_events'], result['events_per_sec'], result['peak_rss_mb']))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--quick', action="store_true", help="Smaller grid, up to 10k nodes")
+    args = parser.parse_args()
+    print("grid,s1,s2,event_queue,load,no_urllc,no_mmtc,wall_time,no_events,events_per_sec,peak_rss_mb")
+    results = run(args.quick, print_result)
+    for pair, exponent in get_scaling_exponents(results).items():
+        print("Scaling exponent {}: {:.2f}".format(pair, exponent))
+    crossover = get_crossover(results)
+    if crossover is None:
+        print("Calendar queue: not faster than the heap")
+    else:
+        print("Calendar queue: faster than the heap from {} mMTC nodes".format(crossover))
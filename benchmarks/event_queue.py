@@ -0,0 +1,42 @@
+"""
+Hold-model benchmark of the event queue backends
+
+Fills each backend with a number of pending arrivals, then repeatedly pops the next event and pushes a new one an
+exponential interarrival time later, like an mMTC node does. Run from the repository root:
+
+    python3 -m benchmarks.event_queue
+"""
+
+import random
+import time
+from events.event_heap import EventHeap
+from events.calendar_queue import CalendarQueue
+
+PENDING = [1000, 10000, 100000, 500000]
+OPERATIONS = 200000
+MEAN_ARRIVAL_TIME = 50
+FRAME_LENGTH = 0.5
+
+backends = {
+    'heap': lambda: EventHeap(),
+    'calendar': lambda: CalendarQueue(FRAME_LENGTH),
+}
+
+
+def hold(queue, pending, operations):
+    """ Returns the number of pop/push pairs per second with the given number of pending events """
+    rng = random.Random(1)
+    for i in range(pending):
+        queue.push(7, rng.expovariate(1 / MEAN_ARRIVAL_TIME), 0, i, i)
+    start = time.perf_counter()
+    for i in range(operations):
+        entry = queue.pop()
+        queue.push(7, entry[0] + rng.expovariate(1 / MEAN_ARRIVAL_TIME), 0, 0, 0)
+    return operations / (time.perf_counter() - start)
+
+
+if __name__ == '__main__':
+    print("pending,backend,ops_per_sec")
+    for pending in PENDING:
+        for name, backend in backends.items():
+            print("{},{},{}".format(pending, name, round(hold(backend(), pending, OPERATIONS))))
@@ -0,0 +1,124 @@
+"""
+Microbenchmarks of the simulator core
+
+Times EventHeap.push/pop, EventGenerator.get_next, Trace.write_trace and Trace.process on their own. Run from the
+repository root:
+
+    python3 -m benchmarks.micro
+"""
+
+import random
+import time
+from events.event_heap import EventHeap
+from events.event_generator import EventGenerator, VariateStream
+from utilities.trace import Trace
+
+OPERATIONS = 200000
+REPEATS = 3
+
+
+def best_of(function, repeats=REPEATS):
+    """ Smallest wall time of repeated calls, the least disturbed one """
+    return min(function() for _ in range(repeats))
+
+
+def event_heap_push(operations=OPERATIONS):
+    rng = random.Random(1)
+    times = [rng.random() * 1000 for _ in range(operations)]
+
+    def measure():
+        heap = EventHeap()
+        start = time.perf_counter()
+        for i, event_time in enumerate(times):
+            heap.push(7, event_time, event_time + 50, i, i)
+        return time.perf_counter() - start
+    return best_of(measure)
+
+
+def event_heap_pop(operations=OPERATIONS):
+    rng = random.Random(1)
+    times = [rng.random() * 1000 for _ in range(operations)]
+
+    def measure():
+        heap = EventHeap()
+        for i, event_time in enumerate(times):
+            heap.push(7, event_time, event_time + 50, i, i)
+        start = time.perf_counter()
+        for _ in range(operations):
+            heap.pop()
+        return time.perf_counter() - start
+    return best_of(measure)
+
+
+def event_generator_get_next(operations=OPERATIONS):
+    def measure():
+        generator = EventGenerator('exponential', {'mean_arrival_time': 50}, VariateStream())
+        start = time.perf_counter()
+        for _ in range(operations):
+            generator.get_next()
+        return time.perf_counter() - start
+    return best_of(measure)
+
+
+def _entries(operations):
+    rng = random.Random(1)
+    entries = []
+    for i in range(operations):
+        arrival_time = rng.random() * 1000
+        entries.append({'event_type': 6 + i % 2, 'node_id': i % 1000, 'counter': i, 'arrival_time': arrival_time,
+                         'dead_time': arrival_time + 1, 'departure_time': arrival_time + rng.random(),
+                         'pilot': rng.random() < 0.9})
+    return entries
+
+
+def trace_write_trace(operations=OPERATIONS):
+    entries = _entries(operations)
+
+    def measure():
+        trace = Trace(None, 13)
+        start = time.perf_counter()
+        for entry in entries:
+            trace.write_trace(entry)
+        return time.perf_counter() - start
+    return best_of(measure)
+
+
+def trace_process(operations=OPERATIONS):
+    entries = _entries(operations)
+    trace = Trace(None, 13)
+    for entry in entries:
+        trace.write_trace(entry)
+
+    def measure():
+        start = time.perf_counter()
+        trace.process()
+        return time.perf_counter() - start
+    return best_of(measure)
+
+
+BENCHMARKS = {
+    'EventHeap.push': event_heap_push,
+    'EventHeap.pop': event_heap_pop,
+    'EventGenerator.get_next': event_generator_get_next,
+    'Trace.write_trace': trace_write_trace,
+    'Trace.process': trace_process,
+}
+
+
+def run(operations=OPERATIONS, callback=None):
+    """ Run all the microbenchmarks, returns one dict per benchmark with its wall time and operations per second """
+    results = []
+    for name, benchmark in BENCHMARKS.items():
+        wall_time = benchmark(operations)
+        result = {'name': name, 'operations': operations, 'wall_time': wall_time,
+                  'ops_per_sec': operations / wall_time if wall_time > 0 else 0.0}
+        results.append(result)
+        if callback is not None:
+            callback(result)
+    return results
+
+
+if __name__ == '__main__':
+    print("benchmark,operations,wall_time,ops_per_sec")
+    run(callback=lambda result: print("{},{},{:.4f},{:.0f}".format(
+        result['name'], result['operations'], result['wall_time'], result['ops_per_sec'])))
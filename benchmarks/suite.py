@@ -0,0 +1,114 @@
+"""
+Benchmark suite with JSON baselines
+
+Runs the microbenchmarks and the end-to-end benchmark, prints the results and the scaling exponents, and
+optionally saves them as a JSON baseline or compares them to one. A comparison lists every case slower, or using
+more memory, than the baseline by more than the tolerance and exits with status 1 if there is any. Run from the
+repository root:
+
+    python3 -m benchmarks.suite --save benchmarks/baselines/main.json
+    python3 -m benchmarks.suite --compare benchmarks/baselines/main.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import numpy as np
+from benchmarks import end_to_end, micro
+
+TOLERANCE = 0.2
+
+
+def get_metadata():
+    try:
+        commit = subprocess.check_output(['git', 'rev-parse', 'HEAD'], stderr=subprocess.DEVNULL).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {'date': time.strftime('%Y-%m-%d %H:%M:%S'),
+            'commit': commit,
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'machine': platform.machine(),
+            'processor': platform.processor(),
+            'cpu_count': os.cpu_count()}
+
+
+def compare(results, baseline, tolerance=TOLERANCE):
+    """
+    Regressions of results with respect to a baseline
+
+    Returns
+    -------
+    list
+        One message per case and metric worse than the baseline by more than tolerance
+    """
+    regressions = []
+    old = dict((result['name'], result) for result in baseline.get('micro', []))
+    for result in results['micro']:
+        if result['name'] in old and result['ops_per_sec'] < (1 - tolerance) * old[result['name']]['ops_per_sec']:
+            regressions.append("{}: {:.0f} ops/s, baseline {:.0f}".format(
+                result['name'], result['ops_per_sec'], old[result['name']]['ops_per_sec']))
+
+    def key(case):
+        # Baselines saved before the event queue grid ran every case on the heap
+        return (case['grid'], case['s1'], case['s2'], case.get('event_queue', 'heap'), case['load'], case['no_urllc'],
+                case['no_mmtc'])
+    old = dict((key(result), result) for result in baseline.get('end_to_end', []))
+    for result in results['end_to_end']:
+        if key(result) not in old:
+            continue
+        reference = old[key(result)]
+        if result['wall_time'] > (1 + tolerance) * reference['wall_time']:
+            regressions.append("{}: {:.3f} s, baseline {:.3f} s".format(
+                key(result), result['wall_time'], reference['wall_time']))
+        if result['peak_rss_mb'] > (1 + tolerance) * reference['peak_rss_mb']:
+            regressions.append("{}: {:.1f} MB, baseline {:.1f} MB".format(
+                key(result), result['peak_rss_mb'], reference['peak_rss_mb']))
+    return regressions
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--quick', action="store_true", help="Smaller end-to-end grid, up to 10k nodes")
+    parser.add_argument('--save', action="store", default=None, help="Path of the JSON baseline to write")
+    parser.add_argument('--compare', action="store", default=None, help="Path of the JSON baseline to compare to")
+    parser.add_argument('--tolerance', action="store", type=float, default=TOLERANCE)
+    args = parser.parse_args()
+
+    print("benchmark,operations,wall_time,ops_per_sec")
+    micro_results = micro.run(callback=lambda result: print("{},{},{:.4f},{:.0f}".format(
+        result['name'], result['operations'], result['wall_time'], result['ops_per_sec'])))
+    print("grid,s1,s2,event_queue,load,no_urllc,no_mmtc,wall_time,no_events,events_per_sec,peak_rss_mb")
+    end_to_end_results = end_to_end.run(args.quick, end_to_end.print_result)
+    exponents = end_to_end.get_scaling_exponents(end_to_end_results)
+    for pair, exponent in exponents.items():
+        print("Scaling exponent {}: {:.2f}".format(pair, exponent))
+    crossover = end_to_end.get_crossover(end_to_end_results)
+    if crossover is None:
+        print("Calendar queue: not faster than the heap")
+    else:
+        print("Calendar queue: faster than the heap from {} mMTC nodes".format(crossover))
+
+    results = {'metadata': get_metadata(),
+               'micro': micro_results,
+               'end_to_end': end_to_end_results,
+               'scaling_exponents': exponents,
+               'calendar_crossover': crossover}
+    if args.save is not None:
+        directory = os.path.dirname(args.save)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(args.save, 'w') as file:
+            json.dump(results, file, indent=2)
+    if args.compare is not None:
+        with open(args.compare) as file:
+            regressions = compare(results, json.load(file), args.tolerance)
+        for regression in regressions:
+            print("Regression " + regression)
+        if regressions:
+            sys.exit(1)
+        print("No regression")
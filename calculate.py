@@ -1,86 +1,112 @@
-import csv
+import os
 import numpy as np
 import scipy.stats as st
 import argparse
 import sys
+from utilities.trace import Trace
+from utilities.results_db import ResultsDB, RESULTS_DB
+from schedulers import get_scheduler_names
 
 result_path = "results/"
 result_file = "statistics.csv"
-try:
-    statistics = open(result_path + result_file, "a")
-except FileNotFoundError:
-    statistics = open(result_path + result_file, "w+")
-    statistics.write("Strategy,Traffic,No.URLLC,No.mMTC,"
-                     "Uw_mean,Uw_var,Uw_con_low,Uw_con_high,"
-                     "Mw_mean,Mw_var,Mw_con_low,Mw_con_high,"
-                     "Ul_mean,Ul_var,Ul_con_low,Mw_con_high,"
-                     "Ml_mean,Ml_var,Ml_con_low,Mw_con_high\n")
 
-line_counter = 0
-keys = ['No.URLLC', 'No.mMTC', 'URLLC_wait_time', 'mMTC_wait_time', 'URLLC_loss_rate', 'mMTC_loss_rate']
+# Per run values averaged over the last runs of a scenario
+keys = ['urllc_wait_mean', 'mmtc_wait_mean', 'urllc_loss', 'mmtc_loss']
+
+
+def split_scheduler(scheduler):
+    """
+    Splits a strategy pair such as RR_Q_FCFS into the strategies of both slices
+
+    The names themselves contain underscores, so the pair is split where both parts are registered strategies.
+
+    Returns
+    -------
+    tuple
+        (s1, s2), None if the pair does not split into two registered strategies in exactly one way
+    """
+    names = get_scheduler_names()
+    pairs = [(scheduler[:i], scheduler[i + 1:]) for i, char in enumerate(scheduler) if char == '_']
+    pairs = [(s1, s2) for s1, s2 in pairs if s1 in names and s2 in names]
+    return pairs[0] if len(pairs) == 1 else None
 
 
 parser = argparse.ArgumentParser()
-parser.add_argument('--scheduler', action="store", default=None)
+parser.add_argument('--scheduler', action="store", default=None, help="Strategy pair, e.g. RR_Q_FCFS")
+parser.add_argument('--s1', action="store", default=None)
+parser.add_argument('--s2', action="store", default=None)
 parser.add_argument('--reliability', action="store", default=None)
 parser.add_argument('--deadline', action="store", default=None)
+parser.add_argument('--mu', action="store", type=float, default=None)
+parser.add_argument('--last', action="store", type=int, default=10, help="Number of runs averaged per scenario")
+parser.add_argument('--database', action="store", default=RESULTS_DB)
+parser.add_argument('--trace', action="store", default=None)
 
 args = parser.parse_args()
-strategy = args.scheduler
-traffic = args.reliability + "_" + args.deadline
-
-
-file_path = result_path + strategy + "/" + traffic + ".csv"
-Dict = dict((key, []) for key in keys)
-with open(file_path) as file:
-    csv_reader = csv.reader(file, delimiter=',')
-    for line in reversed(list(csv_reader)):
-        line_counter += 1
-        for i in range(len(line)):
-            value = float(line[i])
-            Dict[keys[i]] = np.append(Dict[keys[i]], value)
-        if line_counter == 10:
-            break
-
-uniq = 0
-if len(Dict[keys[0]]) > 0:
-    uniq = np.unique(Dict[keys[0]])
-    if len(uniq) > 1:
-        statistics.write("Received wrong URLLC data for current parameter configuration\n")
-        print(uniq)
-        sys.exit(0)
-    else:
-        uniq = np.unique(Dict[keys[1]])
-        if len(uniq) > 1:
-            statistics.write("Received wrong mMTC data for current parameter configuration\n")
-            sys.exit(0)
-        else:
-            statistics.write(strategy + ',' + traffic + ',' +
-                             str(Dict[keys[0]][0]) + ',' +
-                             str(Dict[keys[1]][0]) + ',')
-else:
-    statistics.write("Received no data for current parameter configuration\n")
+
+if args.trace is not None:
+    # Waiting time and loss of one binary trace file, memory-mapped
+    trace = Trace.from_file(args.trace)
+    try:
+        trace.process()
+        print(trace.get_waiting_time())
+        print(trace.get_loss_rate())
+    finally:
+        trace.close()
     sys.exit(0)
 
-for i in range(2, 6):
-    value_list = Dict[keys[i]]
-    mean_val = np.mean(value_list)
-    var_val = np.var(value_list)
-    if var_val > 0.0:
-        con_interval = st.t.interval(0.95, len(value_list)-1, loc=mean_val, scale=st.sem(value_list))
-    else:
-        con_interval = (mean_val, mean_val)
-    if i is not 5:
-        statistics.write(str(mean_val) + ',' +
-                         str(var_val) + ',' +
-                         str(con_interval[0]) + ',' +
-                         str(con_interval[1]) + ',')
-    else:
-        statistics.write(str(mean_val) + ',' +
-                         str(var_val) + ',' +
-                         str(con_interval[0]) + ',' +
-                         str(con_interval[1]) + '\n')
+filters = {}
+if args.scheduler is not None:
+    pair = split_scheduler(args.scheduler)
+    if pair is None:
+        parser.error("--scheduler {} is not a pair of the strategies {}, use --s1 and --s2".format(
+            args.scheduler, ', '.join(get_scheduler_names())))
+    filters['s1'], filters['s2'] = pair
+if args.s1 is not None:
+    filters['s1'] = args.s1
+if args.s2 is not None:
+    filters['s2'] = args.s2
+if args.reliability is not None:
+    filters['reliability'] = args.reliability
+if args.deadline is not None:
+    filters['deadline'] = args.deadline
+if args.mu is not None:
+    filters['mu'] = args.mu
 
+# Opening the database creates it, the outputs are only opened once there is data to aggregate
+if not os.path.exists(args.database):
+    print("Received no data for current parameter configuration")
+    sys.exit(0)
 
+with ResultsDB(args.database) as results:
+    scenarios = results.get_scenarios(**filters)
+    if len(scenarios) == 0:
+        print("Received no data for current parameter configuration")
+        sys.exit(0)
+
+    new_file = not os.path.exists(result_path + result_file)
+    statistics = open(result_path + result_file, "a")
+    if new_file:
+        statistics.write("Strategy,Traffic,Mu,No.URLLC,No.mMTC,No.runs,"
+                         "Uw_mean,Uw_var,Uw_con_low,Uw_con_high,"
+                         "Mw_mean,Mw_var,Mw_con_low,Mw_con_high,"
+                         "Ul_mean,Ul_var,Ul_con_low,Ul_con_high,"
+                         "Ml_mean,Ml_var,Ml_con_low,Ml_con_high\n")
 
+    # One line per scenario, over its last runs
+    for scenario in scenarios:
+        runs = results.get_runs(limit=args.last, **scenario)
+        line = [scenario['s1'] + '_' + scenario['s2'], scenario['reliability'] + '_' + scenario['deadline'],
+                scenario['mu'], scenario['no_urllc'], scenario['no_mmtc'], len(runs)]
+        for key in keys:
+            value_list = np.array([run[key] for run in runs], dtype=float)
+            mean_val = np.mean(value_list)
+            var_val = np.var(value_list)
+            if var_val > 0.0:
+                con_interval = st.t.interval(0.95, len(value_list)-1, loc=mean_val, scale=st.sem(value_list))
+            else:
+                con_interval = (mean_val, mean_val)
+            line += [mean_val, var_val, con_interval[0], con_interval[1]]
+        statistics.write(','.join(str(value) for value in line) + '\n')
 
+statistics.close()
@@ -0,0 +1,156 @@
+import heapq
+from events.event import Event
+
+
+class CalendarQueue:
+    """
+    Calendar queue that keeps track of events in chronological order, an alternative to EventHeap
+
+    Time is divided in ticks of one bucket_width (typically one frame), and the calendar is a ring of no_buckets
+    buckets: an event of tick n is put in bucket n % no_buckets, a small binary heap of its own events. An integer
+    clock holds the current tick, no event is earlier. The next event is the head of the bucket of the clock if it
+    falls in the current tick, otherwise the clock advances to the next tick. Every frame has a departure, so the
+    clock rarely visits an empty bucket, and pushing and popping cost O(log events per bucket) instead of
+    O(log events). If a whole round of the ring is empty the clock jumps to the earliest event.
+    The order of the events is the same as in EventHeap: (time, type, key).
+
+    Implements the same interface as EventHeap: push, push_many, pop, get_heap and get_size.
+
+    Attributes
+    ----------
+    __width : float
+        Time covered by one tick
+    __key : int
+        Tiebreaker if two events have the same time, keeps the order stable
+    __buckets : list
+        Ring of binary heaps, bucket i holds the events of the ticks equal to i modulo the number of buckets
+    __tick : int
+        Current tick of the clock, no queued event is in an earlier tick
+    __size : int
+        Number of events in the queue
+    """
+
+    # Ticks in one round of the ring, covers the lifetime of most pending events with frame sized ticks
+    NO_BUCKETS = 1024
+
+    def __init__(self, bucket_width, no_buckets=NO_BUCKETS):
+        """
+        Initializes a new, empty calendar queue
+
+        Parameters
+        ----------
+        bucket_width : float
+            Time covered by one tick, e.g. the frame length
+        no_buckets : int
+            Number of buckets of the ring
+        """
+
+        self.__width = bucket_width
+        self.__key = 0
+        self.__buckets = [[] for i in range(no_buckets)]
+        self.__tick = 0
+        self.__size = 0
+
+    def push(self, event_type, event_time, dead_time=None, node_id=0, counter=0):
+        """
+        Inserts a new event in the bucket of its tick
+
+        Parameters
+        ----------
+        event_type : int
+            Event type, e.g. arrival or departure
+        event_time : float
+            Positive float (presumably greater than the current time in the simulation)
+        node_id : int
+            What node (i.e. machine/device) this event belongs to
+        """
+
+        entry = (event_time, event_type, self.__key, Event(event_type, event_time, dead_time, node_id, counter))
+        self.__key += 1
+        self.__size += 1
+        tick = int(event_time // self.__width)
+        if tick < self.__tick:
+            self.__tick = tick
+        buckets = self.__buckets
+        heapq.heappush(buckets[tick % len(buckets)], entry)
+
+    def push_many(self, event_type, event_times, dead_times, node_ids, counters):
+        """
+        Inserts many events of the same type at once, every touched bucket is rebuilt with a single heapify
+
+        Parameters
+        ----------
+        event_type : int
+            Event type of all the events
+        event_times : iterable
+            Event time of every event
+        dead_times : iterable
+            Dead time of every event
+        node_ids : iterable
+            Node of every event
+        counters : iterable
+            Counter of every event
+        """
+
+        buckets = self.__buckets
+        no_buckets = len(buckets)
+        width = self.__width
+        touched = set()
+        first = self.__tick if self.__size else None
+        key = self.__key
+        for event_time, dead_time, node_id, counter in zip(event_times, dead_times, node_ids, counters):
+            tick = int(event_time // width)
+            if first is None or tick < first:
+                first = tick
+            buckets[tick % no_buckets].append(
+                (event_time, event_type, key, Event(event_type, event_time, dead_time, node_id, counter)))
+            touched.add(tick % no_buckets)
+            key += 1
+        self.__size += key - self.__key
+        self.__key = key
+        for index in touched:
+            heapq.heapify(buckets[index])
+        if first is not None:
+            self.__tick = first
+
+    def pop(self):
+        """
+        Fetches the next event in time
+
+        Returns
+        -------
+        tuple
+            (time, type, key, Event) of the next event in time
+
+        Raises
+        ------
+        IndexError
+            If the queue is empty
+        """
+
+        if self.__size == 0:
+            raise IndexError("pop from an empty calendar queue")
+        buckets = self.__buckets
+        no_buckets = len(buckets)
+        width = self.__width
+        tick = self.__tick
+        bucket = buckets[tick % no_buckets]
+        if not bucket or bucket[0][0] // width > tick:
+            for i in range(no_buckets):
+                tick += 1
+                bucket = buckets[tick % no_buckets]
+                if bucket and bucket[0][0] // width <= tick:
+                    break
+            else:
+                # A whole round without an event of the current tick, jump to the earliest event
+                tick = int(min(bucket[0] for bucket in buckets if bucket)[0] // width)
+                bucket = buckets[tick % no_buckets]
+            self.__tick = tick
+        self.__size -= 1
+        return heapq.heappop(bucket)
+
+    def get_heap(self):
+        return sorted(entry for bucket in self.__buckets for entry in bucket)
+
+    def get_size(self):
+        return self.__size
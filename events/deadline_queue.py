@@ -0,0 +1,124 @@
+import heapq
+
+
+class DeadlineQueue:
+    """
+    Queue of pending requests ordered by their dead time (earliest deadline first)
+
+    Requests with the same dead time keep their arrival order. Removing an arbitrary request only marks its
+    heap entry as removed, the entry is discarded once it reaches the top of the heap.
+
+    Attributes
+    ----------
+    __heap : list
+        Binary heap of [dead_time, key, event] entries, event is None for removed entries
+    __entries : dict
+        Maps every queued event to its heap entry, in arrival order
+    __key : int
+        Tiebreaker if two requests have the same dead time, keeps the order stable
+    """
+
+    def __init__(self):
+        self.__heap = []
+        self.__entries = {}
+        self.__key = 0
+
+    def __len__(self):
+        return len(self.__entries)
+
+    def __iter__(self):
+        # Iterates the queued requests in arrival order
+        return iter(list(self.__entries))
+
+    def __contains__(self, event):
+        return event in self.__entries
+
+    def push(self, event):
+        """
+        Inserts a request according to its dead time
+
+        Parameters
+        ----------
+        event : Event
+            The request, must have a dead_time
+        """
+
+        entry = [event.dead_time, self.__key, event]
+        self.__key += 1
+        self.__entries[event] = entry
+        heapq.heappush(self.__heap, entry)
+
+    def peek(self):
+        """
+        Returns the request with the earliest dead time without removing it, None if the queue is empty
+        """
+
+        self.__prune()
+        if self.__heap:
+            return self.__heap[0][2]
+        return None
+
+    def pop(self):
+        """
+        Removes and returns the request with the earliest dead time
+
+        Raises
+        ------
+        IndexError
+            If the queue is empty
+        """
+
+        self.__prune()
+        event = heapq.heappop(self.__heap)[2]
+        del self.__entries[event]
+        return event
+
+    def pop_expired(self, time):
+        """
+        Removes and returns all the requests with a dead time before the given time
+
+        Parameters
+        ----------
+        time : float
+            Current time, requests with dead_time < time are expired
+
+        Returns
+        -------
+        list
+            The expired requests, earliest dead time first
+        """
+
+        expired = []
+        heap = self.__heap
+        while heap:
+            entry = heap[0]
+            if entry[2] is not None:
+                if entry[0] >= time:
+                    break
+                del self.__entries[entry[2]]
+                expired.append(entry[2])
+            heapq.heappop(heap)
+        return expired
+
+    def remove(self, event):
+        """
+        Removes an arbitrary request from the queue
+
+        Raises
+        ------
+        KeyError
+            If the request is not in the queue
+        """
+
+        entry = self.__entries.pop(event)
+        entry[2] = None
+        # Rebuild the heap when the removed entries dominate it
+        if len(self.__heap) > 2 * len(self.__entries) + 64:
+            self.__heap = [entry for entry in self.__heap if entry[2] is not None]
+            heapq.heapify(self.__heap)
+
+    def __prune(self):
+        # Drop the removed entries from the top of the heap
+        heap = self.__heap
+        while heap and heap[0][2] is None:
+            heapq.heappop(heap)
@@ -17,10 +17,10 @@ class Event:
         Positive float, at which the event is dropped when no pilot has been assigned yet
     counter: int
         Count how many packets have arrived
-    trace: dictionary
-        Trace the life time of a packet
     """
 
+    __slots__ = ('type', 'time', 'node_id', 'dead_time', 'counter')
+
     def __init__(self, event_type, event_time, dead_time=None, node_id=0, counter=0):
         """
         Initializes a new event
@@ -40,12 +40,17 @@ class Event:
         self.node_id = node_id
         self.dead_time = dead_time
         self.counter = counter
-        self.trace = {'event_type': event_type, 'node_id': node_id, 'counter': counter,
-                      'arrival_time': event_time, 'dead_time': dead_time, 'departure_time': 0,
-                      'pilot': False}
 
     def get_entry(self, departure_time, pilot):
-        self.trace['departure_time'] = departure_time
-        self.trace['pilot'] = pilot
+        """
+        Builds the trace record of the packet, only called once its life time is over
+
+        Returns
+        -------
+        dict
+            Trace the life time of a packet
+        """
 
-        return self.trace
+        return {'event_type': self.type, 'node_id': self.node_id, 'counter': self.counter,
+                'arrival_time': self.time, 'dead_time': self.dead_time, 'departure_time': departure_time,
+                'pilot': pilot}
@@ -1,6 +1,77 @@
 import numpy as np
 import time
 
+class VariateStream:
+    """
+        Source of standard random variates drawn from NumPy in blocks
+
+        Reference ordering: each family (standard exponential, standard normal and uniform on [0, 1)) has its
+        own buffer. When a buffer runs out, the next BLOCK_SIZE variates of the family are drawn from the random
+        generator in one call. The n-th scalar variate requested of a family is thus the n-th element of the
+        concatenated blocks of that family, whatever generator requested it. Arrays drawn with the *_array
+        methods (initial offsets) are taken from the random generator directly at the time of the
+        call, bypassing the buffers.
+
+        Attributes
+        ----------
+        block_size : int
+            Number of variates drawn per refill
+        rng : numpy.random.Generator
+            Random generator the variates are drawn from, the global np.random state if None
+    """
+
+    BLOCK_SIZE = 4096
+
+    def __init__(self, block_size=BLOCK_SIZE, rng=None):
+        self.block_size = block_size
+        self.rng = rng if rng is not None else np.random
+        self.__exponential = iter(())
+        self.__normal = iter(())
+        self.__uniform = iter(())
+
+    def exponential(self):
+        # Returns a float from a standard exponential distribution
+        try:
+            return next(self.__exponential)
+        except StopIteration:
+            self.__exponential = iter(self.rng.standard_exponential(self.block_size).tolist())
+            return next(self.__exponential)
+
+    def normal(self):
+        # Returns a float from a standard normal distribution
+        try:
+            return next(self.__normal)
+        except StopIteration:
+            self.__normal = iter(self.rng.standard_normal(self.block_size).tolist())
+            return next(self.__normal)
+
+    def uniform(self):
+        # Returns a float from a uniform distribution on [0, 1)
+        try:
+            return next(self.__uniform)
+        except StopIteration:
+            self.__uniform = iter(self.rng.random(self.block_size).tolist())
+            return next(self.__uniform)
+
+    def exponential_array(self, size):
+        # Returns an array of floats from a standard exponential distribution, drawn in one call
+        return self.rng.standard_exponential(size)
+
+    def normal_array(self, loc, scale, size):
+        # Returns an array of floats from a normal distribution, drawn in one call
+        return self.rng.normal(loc, scale, size)
+
+    def uniform_array(self, size):
+        # Returns an array of floats from a uniform distribution on [0, 1), drawn in one call
+        return self.rng.random(size)
+
+
+def _spawn(rng):
+    # Returns a random generator independent of rng, the global np.random state has no seed sequence to spawn
+    if isinstance(rng, np.random.Generator):
+        return rng.spawn(1)[0]
+    return np.random.default_rng(rng.randint(2 ** 63, dtype=np.int64))
+
 
 class EventGenerator:
     """
@@ -11,15 +82,24 @@ class EventGenerator:
         distribution : str
             A specified and valid distribution. Currently supports:
                 - Exponential
+                - Uniform
                 - Constant
         settings : dict
             Dictionary of parameters for the specified distribution. Needed parameters are:
                 - Exponential: mean_arrival_time (mean arrival time)
+                - Uniform: max_arrival_time (maximum arrival time)
                 - Constant: arrival_time (arrival time)
+        stream : VariateStream
+            Source of the random variates, shared by the generators of a slice. The constant distribution only
+            draws its initial offset from it, the intervals come from a private stream spawned from its random
+            generator, so the schedule of a node does not depend on the other nodes nor on the horizon
 
     """
 
-    def __init__(self, distribution, settings):
+    # Variates per refill of the private stream of a constant generator
+    INTERVAL_BLOCK_SIZE = 32
+
+    def __init__(self, distribution, settings, stream=None):
         """
         Initializes a new event generator. See class documentation for parameters explanation.
 
@@ -29,22 +109,29 @@ class EventGenerator:
             See class documentation
         settings : dict
             See class documentation
+        stream : VariateStream
+            See class documentation, a private stream is created if None
         """
 
         self.__distribution = distribution
         self.__settings = settings
-
-        self.mapping = {
-            'exponential': self.__exponential,
-            'uniform': self.__uniform,
-            'constant': self.__constant
-        }
-
-        self.init_mapping = {
-            'exponential': self.__exponential,
-            'uniform': self.__uniform,
-            'constant': self.__constant_init
-        }
+        self.__stream = stream if stream is not None else VariateStream()
+
+        # Bind the generating methods once instead of looking them up on every call
+        if distribution == 'exponential':
+            self.__scale = settings.get('mean_arrival_time')
+            self.__next = self.__init = self.__exponential
+        elif distribution == 'uniform':
+            self.__scale = settings.get('max_arrival_time')
+            self.__next = self.__init = self.__uniform
+        elif distribution == 'constant':
+            self.__scale = settings
+            self.__next = self.__constant
+            self.__init = self.__constant_init
+            # Private stream of the jittered intervals, in small blocks since every URLLC node holds one
+            self.__intervals = VariateStream(self.INTERVAL_BLOCK_SIZE, _spawn(self.__stream.rng))
+        else:
+            raise KeyError(distribution)
 
         self.seed_counter = None
 
@@ -58,25 +145,52 @@ class EventGenerator:
             A float with the next event time
         """
 
-        return self.mapping[self.__distribution]()
+        return self.__next()
 
     def get_init(self):
-        return self.init_mapping[self.__distribution]()
+        return self.__init()
+
+    @staticmethod
+    def init_offsets(generators):
+        """
+        Draws the initial event times of many generators in one vectorized call
+
+        The generators must share the distribution, settings and stream, like the nodes of a slice do.
+
+        Parameters
+        ----------
+        generators : list
+            EventGenerator objects
+
+        Returns
+        -------
+        ndarray
+            The initial event time of every generator
+        """
+
+        no_generators = len(generators)
+        if no_generators == 0:
+            return np.empty(0)
+        first = generators[0]
+        scale = first.__scale
+        stream = first.__stream
+        if first.__distribution == 'exponential':
+            return scale * stream.exponential_array(no_generators)
+        if first.__distribution == 'uniform':
+            return scale * stream.uniform_array(no_generators)
+        return np.abs(stream.normal_array(0, 0.5, no_generators))
 
     def __exponential(self):
         # Returns float from an exponential distribution
-
-        return np.random.exponential(self.__settings.get('mean_arrival_time'))
+        return self.__scale * self.__stream.exponential()
 
     def __uniform(self):
         # Return float from a uniform distribution
-
-        return np.random.uniform(0, self.__settings.get('max_arrival_time'))
+        return self.__scale * self.__stream.uniform()
 
     def __constant(self):
         # Returns a float from a constant distribution with noise
-        return self.__settings * np.random.normal(1, 0.05)
+        return self.__scale * (1 + 0.05 * self.__intervals.normal())
 
     def __constant_init(self):
-        return abs(np.random.normal(0, 0.5))
-
+        return abs(0.5 * self.__stream.normal())
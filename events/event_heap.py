@@ -50,6 +50,32 @@ class EventHeap:
         heapq.heappush(self.__heap, (event_time, event_type, self.__key, new_event))
         self.__key += 1
 
+    def push_many(self, event_type, event_times, dead_times, node_ids, counters):
+        """
+        Inserts many events of the same type at once, the heap is rebuilt with a single heapify
+
+        Parameters
+        ----------
+        event_type : int
+            Event type of all the events
+        event_times : iterable
+            Event time of every event
+        dead_times : iterable
+            Dead time of every event
+        node_ids : iterable
+            Node of every event
+        counters : iterable
+            Counter of every event
+        """
+
+        key = self.__key
+        entries = [(event_time, event_type, key + i, Event(event_type, event_time, dead_time, node_id, counter))
+                   for i, (event_time, dead_time, node_id, counter)
+                   in enumerate(zip(event_times, dead_times, node_ids, counters))]
+        self.__key += len(entries)
+        self.__heap.extend(entries)
+        heapq.heapify(self.__heap)
+
     def pop(self):
         """
         Fetches the next event in time
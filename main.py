@@ -4,13 +4,15 @@ Massive MIMO Network slicing on MAC layer simulation
 """
 
 import json
+import logging
 import time
 import sys
 import os
-import numpy as np
 from utilities.stats import Stats
-from utilities.trace import Trace
+from utilities.trace import Trace, next_prime
+from utilities.random_streams import RandomStreams
 from simulation import Simulation
+from utilities.run_cache import RunCache
 import argparse
 sys.path.append(os.path.abspath('../'))
 
@@ -18,16 +20,6 @@ with open('default_config.json') as config_file:
     config = json.load(config_file)
 
 
-def isprime(N):
-    if N<=1 or N==4:
-        return False
-    else:
-        for i in range(2, N//2):
-            if N%i == 0:
-                return False
-        return True
-
-
 if __name__ == '__main__':
     # Load simulation parameters
     time_string = time.strftime('%Y%m%d_%H%M%S')
@@ -42,24 +34,19 @@ if __name__ == '__main__':
     parser.add_argument('--mmtc_nodes', action="store", type=int, default=None)
     parser.add_argument('--mu', action="store", type=float, default=None)
     parser.add_argument('--seed', action="store", type=int, default=1)
+    parser.add_argument('--refresh', action="store_true", help="Run again even if the run is cached")
 
     args = parser.parse_args()
     # print(args.scheduler)
+    logging.basicConfig(format='%(message)s')
 
     log_file_path = 'logs/seed_log.csv'
     stats_file_path = 'stats/simulation_stats.csv'
-    # Initialize stats and logger
-    stats = Stats(stats_file_path)
     seed = args.seed
     mu = float(args.mu)
 
-    try:
-        file = open(log_file_path, 'a')
-    except FileNotFoundError:
-        print("No log file found, create the file first")
-        file = open(log_file_path, 'w+')
-
-    np.random.seed(seed)
+    # One independent stream per part of the simulation, the arrivals do not depend on the strategies
+    streams = RandomStreams(seed)
 
     if args.urllc_nodes is None:
         with open('slices/slice_config.json') as config_file:
@@ -75,39 +62,63 @@ if __name__ == '__main__':
     else:
         no_mmtc = args.mmtc_nodes
         
-    sampling=no_urllc
+    sampling = next_prime(no_urllc)
+
+    # Skip the runs already computed with the same scenario and code
+    cache = RunCache(config['run_cache']) if config.get('run_cache') else None
+    if cache is not None:
+        cache_key = cache.get_key(config, {'s1': args.s1, 's2': args.s2, 'reliability': args.reliability,
+                                           'deadline': args.deadline, 'no_urllc': no_urllc, 'no_mmtc': no_mmtc,
+                                           'mu': mu, 'seed': seed})
+        if not args.refresh and cache_key in cache:
+            print("Run already computed, cached as {}".format(cache_key))
+            sys.exit(0)
+
+    # Initialize stats and logger, only for the runs not found in the cache
+    stats = Stats(stats_file_path)
+    try:
+        file = open(log_file_path, 'a')
+    except FileNotFoundError:
+        print("No log file found, create the file first")
+        file = open(log_file_path, 'w+')
 
-    while True:
-        if isprime(sampling):
-            break
-        else:
-            sampling += 1
-    
     # print(sampling)
-    trace_file_path = 'trace/' + args.deadline + '_' + args.reliability + '-' + args.s1 + '_' +args.s2 + '_' +str(no_urllc) + '_' + str(no_mmtc) + '_' + str(round(time.time())) + '_event_trace.csv'
-    trace = Trace(trace_file_path, sampling, log=True)
+    trace_file_path = 'trace/' + args.deadline + '_' + args.reliability + '-' + args.s1 + '_' +args.s2 + '_' +str(no_urllc) + '_' + str(no_mmtc) + '_' + str(round(time.time())) + '_event_trace'
+    trace_format = config.get('trace_format', 'csv')
+    trace_file_path += '.csv' if trace_format == 'csv' else '.trace'
+    trace = Trace(trace_file_path, sampling, log=True, rng=streams.sampling,
+                  streaming=config.get('trace_streaming', False), trace_format=trace_format,
+                  background=config.get('trace_background', True),
+                  header={'config': config, 'args': vars(args), 'no_urllc': no_urllc, 'no_mmtc': no_mmtc})
 
     if args.s1 is not None:
         if args.reliability is not None and args.deadline is not None:
             simulation = Simulation(config, stats, trace, no_urllc, no_mmtc, mu,
                                     args.s1, args.s2,
-                                    (args.reliability, args.deadline))
+                                    (args.reliability, args.deadline), streams)
             file.write(args.s1 + '-' + args.s2 + ',' + args.reliability + ',' + args.deadline + ','
                        + str(no_urllc) + ',' + str(no_mmtc) + ',' + str(seed) + '\n')
         else:
             simulation = Simulation(config, stats, trace,  no_urllc, no_mmtc, mu,
-                                    args.s1, args.s2)
+                                    args.s1, args.s2, streams=streams)
             file.write(args.s1 + '-' + args.s2 + ',' + str(no_urllc) + ',' + str(no_mmtc) + ',' + str(seed) + '\n')
     else:
-        simulation = Simulation(config, stats, trace, no_urllc, no_mmtc, mu)
+        simulation = Simulation(config, stats, trace, no_urllc, no_mmtc, mu, streams=streams)
         file.write(str(no_urllc) + ',' + str(no_mmtc) + ',' + str(seed) + '\n')
 
     simulation.run()
     stats.save_stats()
+    if simulation.profiler is not None:
+        simulation.profiler.save('stats/simulation_profile.jsonl',
+                                 {'s1': args.s1, 's2': args.s2, 'reliability': args.reliability,
+                                  'deadline': args.deadline, 'no_urllc': no_urllc, 'no_mmtc': no_mmtc, 'mu': mu,
+                                  'seed': seed})
 
     # Close files
     stats.close()
     trace.close()
 
     trace.process()
-    simulation.write_result()
+    summary = simulation.write_result(seed)
+    if cache is not None:
+        cache.put(cache_key, summary, trace_file_path if config.get('run_cache_traces') else None)
@@ -5,32 +5,60 @@ Define customers subscribe to the underlying slices
 __author__ = "Haorui Peng"
 
 from events.event_generator import EventGenerator
+from nodes.request_queue import RequestQueue
 import json
 
+_configs = {}
 
-class Node:
 
+def load_node_config(path='nodes/node_config.json'):
     """
-    Define individual Node subscribe to slices
-    Each one have specific traffic profile requirements
+    Parse the node configuration file, only once per path
 
-    Common traffic profile
-    ----------------------
-    data rate
-    arrival distribution
-    pilot_samples
-    deadline
+    Returns
+    -------
+    dict
+        The parsed configuration, shared by all the callers and not to be modified
+    """
+    config = _configs.get(path)
+    if config is None:
+        with open(path) as config_file:
+            config = json.load(config_file)
+        _configs[path] = config
+    return config
+
+
+class NodeProfile:
+
+    """
+    Traffic profile shared by all the nodes of a slice with the same traffic (flyweight)
+
+    Attributes
+    ----------
+    slice_name : str
+        "urllc" or "mmtc"
+    data_rate : int
+    arrival : str
+        Name of the arrival distribution
+    reliability_profile : str
+    deadline_profile : str
+    deadline : float
+        Time until a request is dropped
+    pilot_samples : int
+        Number of pilots needed by one request
+    arrival_parameter : dict or float
+        Parameters of the arrival distribution, the deadline for the constant distribution
     """
 
+    __slots__ = ('slice_name', 'data_rate', 'arrival', 'reliability_profile', 'deadline_profile',
+                 'deadline', 'pilot_samples', 'arrival_parameter')
+
     _URLLC = 0
     _mMTC = 1
 
-    # the nodes generator the event periodically
-    def __init__(self, slice_id, traffic=None):
-        with open('nodes/node_config.json') as config_file:
-            config = json.load(config_file)
-        self.slice = slice_id
-        self.request_queue = []
+    def __init__(self, slice_id, traffic=None, config=None):
+        if config is None:
+            config = load_node_config()
 
         if slice_id == self._URLLC:
             self.slice_name = "urllc"
@@ -58,14 +86,77 @@ class Node:
         if len(self.arrival_parameter) == 0:
             self.arrival_parameter = self.deadline
 
-        self.event_generator = EventGenerator(self.arrival, self.arrival_parameter)
+
+class Node:
+
+    """
+    Define individual Node subscribe to slices
+    Each one have specific traffic profile requirements
+
+    Common traffic profile
+    ----------------------
+    data rate
+    arrival distribution
+    pilot_samples
+    deadline
+
+    The traffic profile is kept in a NodeProfile shared by the nodes of a slice.
+    """
+
+    __slots__ = ('slice', 'profile', 'request_queue', 'event_generator', 'active', 'assigned')
+
+    _URLLC = 0
+    _mMTC = 1
+
+    # the nodes generator the event periodically
+    def __init__(self, slice_id, traffic=None, stream=None, profile=None):
+        if profile is None:
+            profile = NodeProfile(slice_id, traffic)
+        self.slice = slice_id
+        self.profile = profile
+        self.request_queue = RequestQueue()
+
+        self.event_generator = EventGenerator(profile.arrival, profile.arrival_parameter, stream)
         self.active = False
         self.assigned = False
 
+    @property
+    def slice_name(self):
+        return self.profile.slice_name
+
+    @property
+    def data_rate(self):
+        return self.profile.data_rate
+
+    @property
+    def arrival(self):
+        return self.profile.arrival
+
+    @property
+    def reliability_profile(self):
+        return self.profile.reliability_profile
+
+    @property
+    def deadline_profile(self):
+        return self.profile.deadline_profile
+
+    @property
+    def deadline(self):
+        return self.profile.deadline
+
+    @property
+    def pilot_samples(self):
+        return self.profile.pilot_samples
+
+    @property
+    def arrival_parameter(self):
+        return self.profile.arrival_parameter
+
     def push_event(self, event):
-        self.request_queue.append(event)
+        self.request_queue.push(event)
 
     def remove_event(self, event):
         self.request_queue.remove(event)
 
-
+    def pop_expired(self, time):
+        return self.request_queue.pop_expired(time)
@@ -0,0 +1,152 @@
+class RequestQueue:
+    """
+    Requests queued in a node, ordered by dead time (earliest deadline first)
+
+    All the requests of a node share the deadline of its profile and arrive in time order, so they are pushed in
+    dead time order and appended to a list read from a moving head: the head is read and removed in O(1). A
+    request pushed out of order is inserted at its place. Removing a request other than the head only marks it
+    as removed, it is discarded once it reaches the head. A list is used rather than a deque, which costs more
+    than ten times the memory of an empty list on every node of the pool.
+
+    Attributes
+    ----------
+    __queue : list
+        Queued requests from index __head on, removed ones included, ordered by dead time
+    __head : int
+        Index of the first queued request, the consumed prefix is cut off once it dominates the list
+    __removed : set
+        Requests removed from the middle of the queue, None until the first one
+    __size : int
+        Number of queued requests, removed ones excluded
+    """
+
+    __slots__ = ('__queue', '__head', '__removed', '__size')
+
+    def __init__(self):
+        self.__queue = []
+        self.__head = 0
+        self.__removed = None
+        self.__size = 0
+
+    def __len__(self):
+        return self.__size
+
+    def __iter__(self):
+        # Iterates a snapshot of the queued requests, the queue can be changed meanwhile
+        removed = self.__removed
+        queued = self.__queue[self.__head:]
+        if not removed:
+            return iter(queued)
+        return iter([event for event in queued if event not in removed])
+
+    def push(self, event):
+        """
+        Inserts a request according to its dead time, after the requests with the same dead time
+
+        Parameters
+        ----------
+        event : Event
+            The request, must have a dead_time
+        """
+
+        queue = self.__queue
+        index = len(queue)
+        while index > self.__head and queue[index - 1].dead_time > event.dead_time:
+            index -= 1
+        queue.insert(index, event)
+        self.__size += 1
+
+    def peek(self):
+        """
+        Returns the request with the earliest dead time without removing it, None if the queue is empty
+        """
+
+        self.__prune()
+        if self.__size > 0:
+            return self.__queue[self.__head]
+        return None
+
+    def pop(self):
+        """
+        Removes and returns the request with the earliest dead time
+
+        Raises
+        ------
+        IndexError
+            If the queue is empty
+        """
+
+        self.__prune()
+        if self.__size == 0:
+            raise IndexError("pop from an empty queue")
+        event = self.__queue[self.__head]
+        self.__advance()
+        return event
+
+    def pop_expired(self, time):
+        """
+        Removes and returns all the requests with a dead time before the given time
+
+        Parameters
+        ----------
+        time : float
+            Current time, requests with dead_time < time are expired
+
+        Returns
+        -------
+        list
+            The expired requests, earliest dead time first
+        """
+
+        expired = []
+        self.__prune()
+        while self.__size > 0 and self.__queue[self.__head].dead_time < time:
+            expired.append(self.__queue[self.__head])
+            self.__advance()
+            self.__prune()
+        return expired
+
+    def remove(self, event):
+        """
+        Removes an arbitrary request from the queue, the request must be queued
+
+        Parameters
+        ----------
+        event : Event
+            The request
+        """
+
+        self.__prune()
+        if self.__queue[self.__head] is event:
+            self.__advance()
+            return
+        if self.__removed is None:
+            self.__removed = set()
+        self.__removed.add(event)
+        self.__size -= 1
+
+    def __advance(self):
+        # Consume the head request
+        self.__size -= 1
+        self.__head += 1
+        if self.__size == 0:
+            # Whatever is left was removed already
+            self.__queue.clear()
+            self.__head = 0
+            self.__removed = None
+        elif self.__head > 32 and 2 * self.__head > len(self.__queue):
+            del self.__queue[:self.__head]
+            self.__head = 0
+
+    def __prune(self):
+        # Drop the removed requests from the head of the queue
+        removed = self.__removed
+        if not removed:
+            return
+        queue = self.__queue
+        while self.__head < len(queue) and queue[self.__head] in removed:
+            removed.discard(queue[self.__head])
+            self.__head += 1
+        if self.__head == len(queue):
+            queue.clear()
+            self.__head = 0
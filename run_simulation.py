@@ -1,10 +1,20 @@
-import os
 import numpy as np
-from multiprocessing import Pool
 import json
 import time
-
-PROCESSES = 4
+from simulation import Simulation
+from utilities.sweep import Sweep, spawn_seeds
+from utilities.results_db import ResultsDB
+from utilities.run_cache import RunCache
+
+PROCESSES = None  # All the cores
+REPLICATIONS = 1
+# Target relative half-width of the confidence intervals. If set, every simulation is replicated with new seeds
+# until the URLLC/mMTC wait and loss intervals are that narrow, or MAX_REPLICATIONS is reached
+PRECISION = None
+MAX_REPLICATIONS = 40
+# Seconds without a completed replication after which the outstanding ones are given up, e.g. when a worker was
+# killed by the OS
+REPLICATION_TIMEOUT = 3600
 
 with open('default_config.json') as config_file:
     config = json.load(config_file)
@@ -39,6 +49,32 @@ def rho2mmtc(rho):
     mmtc = rho * total_pilots * mmtc_period / (mmtc_pilot * slot_time)
     return int(round(mmtc))
 
+
+# Independent seed streams, one per replication. All the simulations of a replication share its seed, so
+# strategies are compared on the same arrivals (common random numbers)
+seeds = spawn_seeds(SEED, REPLICATIONS)
+
+
+def add_simulations(s1, s2, reliability, deadline, no_urllc_list, no_mmtc, mu):
+    for seed in seeds:
+        for no_urllc in no_urllc_list:
+            simulations.append({'s1': s1, 's2': s2, 'reliability': reliability, 'deadline': deadline,
+                                'no_urllc': no_urllc, 'no_mmtc': no_mmtc, 'mu': mu, 'seed': seed})
+
+
+results = None
+
+
+def save(summary):
+    # Cached points were saved when they were computed
+    if summary.get('cached'):
+        return
+    # Only the parent process writes the results and the seed log
+    Simulation.save_summary(summary, results)
+    with open('logs/seed_log.csv', 'a') as file:
+        file.write(summary['s1'] + '-' + summary['s2'] + ',' + summary['reliability'] + ',' + summary['deadline'] + ','
+                   + str(summary['no_urllc']) + ',' + str(summary['no_mmtc']) + ',' + str(summary['seed']) + '\n')
+
 #urllc_load = 0.5
 #no_urllc = rho2urllc(urllc_load, urllc_period, urllc_pilot)
 #mmtc_loads = np.linspace(0.1, 1.5, 15)
@@ -57,69 +93,37 @@ mu = 2.26
 
 s2 = "FCFS"
 
-# s1 = "FCFS"
-# for no_urllc in no_urllc_list:
-#     SEED += np.random.randint(100)
-#     simulations.append("python3 main.py \
-#                         --s1 {} --s2 {} --reliability {} --deadline {} \
-#                         --urllc_node {} --mmtc_node {} \
-#                         --seed {}".format(
-#         s1, s2 , reliability, deadline, no_urllc, no_mmtc, SEED))
-#
-# s1 = "RR_Q"
-# for no_urllc in no_urllc_list:
-#     SEED += np.random.randint(100)
-#     simulations.append("python3 main.py \
-#                         --s1 {} --s2 {} --reliability {} --deadline {} \
-#                         --urllc_node {} --mmtc_node {} \
-#                         --seed {}".format(
-#         s1, s2, reliability, deadline, no_urllc, no_mmtc, SEED))
-
-s1 = "FCFS"
-for no_urllc in no_urllc_list:
-    SEED += np.random.randint(100)
-    simulations.append("python3 main.py \
-                        --s1 {} --s2 {} --reliability {} --deadline {} \
-                        --urllc_node {} --mmtc_node {} --mu {} \
-                        --seed {}".format(
-        s1, s2, reliability, deadline, no_urllc, no_mmtc, mu, SEED))
+# add_simulations("FCFS", s2, reliability, deadline, no_urllc_list, no_mmtc, mu)
+# add_simulations("RR_Q", s2, reliability, deadline, no_urllc_list, no_mmtc, mu)
+
+add_simulations("FCFS", s2, reliability, deadline, no_urllc_list, no_mmtc, mu)
 
 # deadline = "short"
 # urllc_period = period[deadline]
 # no_urllc_list = [rho2urllc(rho, urllc_period, urllc_pilot) for rho in urllc_loads]
 # no_urllc_list = list(set(no_urllc_list))  # remove duplicates
 #
-# s1 = "FCFS"
-# for no_urllc in no_urllc_list:
-#     SEED += np.random.randint(100)
-#     simulations.append("python3 main.py \
-#                         --s1 {} --s2 {} --reliability {} --deadline {} \
-#                         --urllc_node {} --mmtc_node {} \
-#                         --seed {}".format(
-#         s1, s2 , reliability, deadline, no_urllc, no_mmtc, SEED))
-#
-# s1 = "RR_Q"
-# for no_urllc in no_urllc_list:
-#     SEED += np.random.randint(100)
-#     simulations.append("python3 main.py \
-#                         --s1 {} --s2 {} --reliability {} --deadline {} \
-#                         --urllc_node {} --mmtc_node {} \
-#                         --seed {}".format(
-#         s1, s2, reliability, deadline, no_urllc, no_mmtc, SEED))
-#
-# s1 = "RR_NQ"
-# for no_urllc in no_urllc_list:
-#     SEED += np.random.randint(100)
-#     simulations.append("python3 main.py \
-#                         --s1 {} --s2 {} --reliability {} --deadline {} \
-#                         --urllc_node {} --mmtc_node {} \
-#                         --seed {}".format(
-#         s1, s2, reliability, deadline, no_urllc, no_mmtc, SEED))
-
-pool = Pool(processes=PROCESSES)
-for k, simulation in enumerate(simulations):
-    pool.apply_async(os.system, (simulation,))
-
-pool.close()
-pool.join()
-print("All simulations completed")
+# add_simulations("FCFS", s2, reliability, deadline, no_urllc_list, no_mmtc, mu)
+# add_simulations("RR_Q", s2, reliability, deadline, no_urllc_list, no_mmtc, mu)
+# add_simulations("RR_NQ", s2, reliability, deadline, no_urllc_list, no_mmtc, mu)
+
+if __name__ == '__main__':
+    results = ResultsDB()
+    # Points already computed with the same scenario and code are taken from the cache
+    cache = RunCache(config['run_cache']) if config.get('run_cache') else None
+    sweep = Sweep(config, PROCESSES, cache)
+    if PRECISION is None:
+        sweep.run(simulations, callback=save)
+        for simulation, error in sweep.failures:
+            print("Simulation {} failed: {}".format(simulation, error))
+    else:
+        for simulation in simulations:
+            summaries = sweep.replicate(simulation, PRECISION, MAX_REPLICATIONS, callback=save,
+                                        timeout=REPLICATION_TIMEOUT)
+            print("{}-{} {} URLLC, {} mMTC: {} replications, converged: {}".format(
+                simulation['s1'], simulation['s2'], simulation['no_urllc'], simulation['no_mmtc'],
+                len(summaries), sweep.converged))
+            for replication, error in sweep.failures:
+                print("Replication {} failed: {}".format(replication, error))
+    results.close()
+    print("All simulations completed, {:.1f} runs/minute".format(sweep.runs_per_minute))
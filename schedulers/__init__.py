@@ -0,0 +1,3 @@
+from schedulers.scheduler import Scheduler, register, get_scheduler, get_scheduler_names
+# Importing the built-in schedulers registers them
+from schedulers import fcfs, round_robin
@@ -0,0 +1,62 @@
+from schedulers.scheduler import Scheduler, register
+from utilities.event_log import SCHED
+
+
+@register('FCFS')
+class FirstComeFirstServed(Scheduler):
+    """
+    The base station serves the requests of the slice earliest deadline first, from the deadline index of the
+    slice, which also holds them in their nodes
+    """
+
+    def enqueue(self, event):
+        # store the event in the node's departure queue and in the deadline index of the slice
+        self.slice.push_event(event)
+
+    def expire(self):
+        simulation = self.simulation
+        # Only the expired prefix of the deadline index is touched
+        expired = self.slice.pop_expired(simulation.time)
+        if simulation.log.sched:
+            simulation.log.debug(SCHED, simulation.time, "{} {} requests expired, remove.", len(expired),
+                                 self.queue_key)
+        for event in expired:
+            if simulation.log.sched:
+                simulation.log.debug(SCHED, simulation.time, "{} request expired, arrive at {}, deadline {}",
+                                     self.queue_key, event.time, event.dead_time)
+        self.drop_expired(expired)
+
+    def assign(self, requests):
+        simulation = self.simulation
+        log = simulation.log
+        _slice = self.slice
+        queue = _slice.deadlines
+        no_pilots = simulation.no_pilots
+        if log.sched:
+            log.debug(SCHED, simulation.time, "Number of active {} request in the queue: {}", self.queue_key,
+                      len(queue))
+        required_pilots = self.slice.profile.pilot_samples
+        counter = requests
+        while counter > 0 and no_pilots > 0:
+            event = queue.peek()
+            counter -= 1
+            if event is None:
+                # No request left, the pilot is wasted
+                no_pilots -= 1
+                if log.sched:
+                    log.debug(SCHED, simulation.time, "No {} requests in the queue, {} pilots wastes",
+                              self.queue_key, 1)
+                simulation.stats.stats['no_waste_pilots'] += 1
+                continue
+            if no_pilots < required_pilots:
+                simulation.no_pilots = no_pilots
+                return
+            no_pilots -= required_pilots
+            # remove the event that assigned the pilots from the queue and its node
+            _slice.pop_event()
+            entry = event.get_entry(simulation.time, True)
+            if log.sched:
+                log.debug(SCHED, simulation.time, "{} Request allocated, arrive at {}, deadline {}",
+                          self.queue_key, entry['arrival_time'], entry['dead_time'])
+            simulation.trace.write_trace(entry)
+        simulation.no_pilots = no_pilots
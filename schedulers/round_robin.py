@@ -0,0 +1,91 @@
+from schedulers.scheduler import Scheduler, register, _URLLC
+
+
+@register('RR_Q')
+class RoundRobinQueueInfo(Scheduler):
+    """
+    Nodes signal their pending requests, the base station serves the active nodes in a round
+    """
+
+    def enqueue(self, event):
+        # store the event in the node's departure queue (this is the queue not maintained by the base station),
+        # the slice marks the node active
+        self.slice.push_event(event)
+
+    def expire(self):
+        # Nodes left without requests are deactivated by the slice
+        self.drop_expired(self.slice.pop_expired(self.simulation.time))
+
+    def assign(self, requests):
+        simulation = self.simulation
+        _slice = self.slice
+        no_pilots = simulation.no_pilots
+        counter = requests
+        # Only the active nodes are visited, in the order of the pool
+        node_id = _slice.next_active(-1)
+        while node_id is not None:
+            _node = _slice.pool[node_id]
+            queue = _node.request_queue
+            # Serve the node from the head of its queue, the slice deactivates it once the queue is empty
+            while queue:
+                event = queue.peek()
+                no_pilots -= _node.pilot_samples
+                if no_pilots >= 0 and counter >= 0:
+                    entry = event.get_entry(simulation.time, True)
+                    counter -= 1
+                    simulation.trace.write_trace(entry)
+                    _slice.remove_event(event)
+                    del event
+                else:
+                    no_pilots += _node.pilot_samples
+                    simulation.no_pilots = no_pilots
+                    return
+            node_id = _slice.next_active(node_id)
+        simulation.no_pilots = no_pilots
+
+
+@register('RR_NQ')
+class RoundRobinNoQueueInfo(Scheduler):
+    """
+    The base station has no information on the queues, it polls the nodes in a round, one per pilot group,
+    restarting from the first node every deadline
+    """
+
+    def __init__(self, simulation, slice_type):
+        assert slice_type == _URLLC, "Method only applicable for slice 1"
+        super().__init__(simulation, slice_type)
+        self.frame_counter = 0
+        self.frame_loops = self.slice.get_node(0).deadline / simulation.frame_length
+        self.node_pointer = 0
+
+    def enqueue(self, event):
+        # store the event in the node's departure queue (this is the queue not maintained by the base station)
+        self.slice.push_event(event)
+
+    def expire(self):
+        self.drop_expired(self.slice.pop_expired(self.simulation.time))
+
+    def assign(self, requests):
+        simulation = self.simulation
+        self.frame_counter = (self.frame_counter + 1) % self.frame_loops
+        if self.frame_counter == 1:
+            self.node_pointer = 0
+        start_ind = self.node_pointer
+        no_pilots = simulation.no_pilots
+        counter = requests
+        for i in range(start_ind, len(self.slice.pool)):
+            _node = self.slice.get_node(i)
+            no_pilots -= _node.pilot_samples
+            if no_pilots >= 0 and counter >= 0:
+                self.node_pointer += 1
+                if len(_node.request_queue) > 0:
+                    counter -= 1
+                    event = _node.request_queue.peek()
+                    self.slice.remove_event(event)
+                    entry = event.get_entry(simulation.time, True)
+                    simulation.trace.write_trace(entry)
+            else:
+                no_pilots += _node.pilot_samples
+                simulation.no_pilots = no_pilots
+                return
+        simulation.no_pilots = no_pilots
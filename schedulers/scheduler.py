@@ -0,0 +1,107 @@
+"""
+Scheduler plugin interface
+
+A scheduler decides how the requests of one slice are queued on arrival, dropped when they expire, and picked
+when the pilots of a frame are assigned. Simulation creates one instance per strategy and slice, the first time a
+decision selects it, and binds its methods until the next decision, so no lookup is done per event.
+
+New strategies are added by subclassing Scheduler and registering the class under the strategy name used in the
+decisions, from any module imported before the simulation is built (see the scheduler_modules configuration):
+
+    @register('EDF')
+    class EarliestDeadlineFirst(Scheduler):
+        ...
+"""
+
+import abc
+from utilities.event_log import SCHED
+
+_URLLC = 0
+_mMTC = 1
+
+_registry = {}
+
+
+def register(name):
+    """ Class decorator registering a Scheduler subclass under a strategy name """
+    def decorator(cls):
+        cls.name = name
+        _registry[name] = cls
+        return cls
+    return decorator
+
+
+def get_scheduler(name):
+    """ Returns the Scheduler subclass registered under a strategy name """
+    try:
+        return _registry[name]
+    except KeyError:
+        raise ValueError("Unknown scheduler: {}".format(name))
+
+
+def get_scheduler_names():
+    """ Returns the registered strategy names, sorted """
+    return sorted(_registry)
+
+
+class Scheduler(abc.ABC):
+    """
+    Base class of the schedulers of one slice
+
+    Attributes
+    ----------
+    name : str
+        Strategy name the class is registered under
+    simulation : Simulation
+        The simulation, schedulers use its time, stats, trace, event_heap, Slices, no_pilots and log
+    slice_type : int
+        0 (URLLC) or 1 (mMTC)
+    slice : Slice
+        The scheduled slice
+    """
+
+    name = None
+
+    def __init__(self, simulation, slice_type):
+        self.simulation = simulation
+        self.slice_type = slice_type
+        self.slice = simulation.Slices[slice_type]
+        self.queue_key = ('_URLLC', '_mMTC')[slice_type]
+        self.no_arrivals = ('no_urllc_arrivals', 'no_mmtc_arrivals')[slice_type]
+        self.no_missed = ('no_missed_urllc', 'no_missed_mmtc')[slice_type]
+
+    def arrival(self, event):
+        """ Handle the arrival event of a request of the slice, queue it and schedule the next arrival of its node """
+        self.enqueue(event)
+        self.schedule_next_arrival(event, self.slice.pool[event.node_id])
+
+    @abc.abstractmethod
+    def enqueue(self, event):
+        """ Queue a request of the slice, requests drawn in batches in the frame-stepped mode are only queued """
+
+    @abc.abstractmethod
+    def expire(self):
+        """ Drop the requests of the slice whose deadline has passed, before the pilots of a frame are assigned """
+
+    @abc.abstractmethod
+    def assign(self, requests):
+        """ Assign the pilots left in simulation.no_pilots to at most the given number of requests """
+
+    def schedule_next_arrival(self, event, node):
+        """ Count an arrival and schedule the next one of the same node """
+        simulation = self.simulation
+        stats = simulation.stats.stats
+        stats[self.no_arrivals] += 1
+        next_arrival = simulation.time + node.event_generator.get_next()
+        simulation.event_heap.push(event.type, next_arrival, next_arrival + node.deadline, event.node_id,
+                                   stats[self.no_arrivals])
+
+    def drop_expired(self, expired):
+        """ Count and trace requests that expired without a pilot """
+        simulation = self.simulation
+        if self.slice_type == _URLLC and len(expired) > 0:
+            simulation.log.anomaly(SCHED, simulation.time, "URLLC loss, {} requests expired", len(expired))
+        stats = simulation.stats.stats
+        for event in expired:
+            stats[self.no_missed] += 1
+            simulation.trace.write_trace(event.get_entry(simulation.time, False))
@@ -1,8 +1,29 @@
-import sys
-import os
+import gc
+import contextlib
+import importlib
 from events.event_heap import EventHeap
+from events.calendar_queue import CalendarQueue
+from events.event_generator import EventGenerator
+from events.event import Event
 import numpy as np
 from slices.slice import Slice
+from utilities.event_log import EventLog, PHY, MAC, EVENT
+from utilities.warmup import WarmupDetector
+from utilities.results_db import ResultsDB, RESULTS_DB
+from utilities.profiler import Profiler
+from schedulers import get_scheduler
+
+
+@contextlib.contextmanager
+def _gc_paused():
+    # Bulk construction only allocates long lived objects, pause the cyclic garbage collector meanwhile
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if enabled:
+            gc.enable()
 
 
 class Simulation:
@@ -28,8 +49,17 @@ class Simulation:
     _DEPARTURE = 5
     _URLLC_ARRIVAL = 6
     _mMTC_ARRIVAL = 7
+
+    _EVENT_NAMES = {
+        _URLLC_ARRIVAL: "URLLC_ARRIVAL",
+        _mMTC_ARRIVAL: "mMTC_ARRIVAL",
+        _DEPARTURE: "ALLOCATION",
+        _REPORT: "SEND_REPORT",
+        _DECISION_MAKE: "REC_REPORT_AND_SEND_DECISION",
+        _DECISION_ARRIVAL: "DECISION_ARRIVAL"
+    }
     
-    def __init__(self, config, stats, trace, no_urllc, no_mmtc, mu, s1=None, s2=None, traffic=None):
+    def __init__(self, config, stats, trace, no_urllc, no_mmtc, mu, s1=None, s2=None, traffic=None, streams=None):
         """
         Initialize simulation object
 
@@ -40,6 +70,21 @@ class Simulation:
             no_pilots : the total number of pilots per coherence interval\
             frame_length : coherence interval
             sampling : The rate to send out the desicions
+            event_queue : backend of the event queue, "heap" (default) or "calendar"
+            log_levels : level of the PHY, MAC, EVENT and SCHED event logs, e.g. {"SCHED": "DEBUG"}
+            log_ring_size : number of last events dumped on an anomaly such as a URLLC loss, 0 to disable
+            warmup_detection : detect the end of the warm-up with MSER-5 and leave it out of the trace statistics
+            steady_state_samples : if set, run until that many packets arrived after the warm-up (implies
+                warmup_detection), simulation_length is then only an upper bound
+            warmup_max_held : number of packets held back from the statistics until the warm-up is detected, the
+                detection then ends with the truncation point found so far, no limit if null
+            profiling : count and time the event handlers and the schedulers, see Profiler
+            scheduler_modules : modules imported before the schedulers are bound, to register extra strategies,
+                see schedulers.scheduler
+            mmtc_frame_stepped : draw the mMTC arrivals as one batch per frame instead of one event per packet,
+                only for exponential mMTC inter-arrival times. A batch is queued to the mMTC scheduler active when
+                it is drawn, at the next departure or report, so a decision arriving mid-frame applies to the whole
+                batch, including its arrivals from before the decision
         stats : Stats
             Statistics object for keeping track for measurements
         trace : bool
@@ -59,18 +104,39 @@ class Simulation:
         traffic : tube of string
             TODO: will be sperated to the UE function
             Traffic type of the slice 1
+        streams : RandomStreams
+            Independent random generators for the arrivals of each slice and the PHY-MAC delay, the global
+            np.random state is used if None
         
         """
 
         self.stats = stats
         self.trace = trace
+        self.log = EventLog(config.get('log_levels'), config.get('log_ring_size', 0))
         self.mu = mu
         self.time = 0.0
+        self.delay_rng = streams.delay if streams is not None else np.random
         
         self.simulation_length = config.get('simulation_length')
         self.frame_length = config.get('frame_length')
         self.sampling = config.get('sampling')
         self.no_pilots = config.get('no_pilots')
+        self.steady_state_samples = config.get('steady_state_samples')
+        if config.get('warmup_detection') or self.steady_state_samples is not None:
+            self.warmup = WarmupDetector()
+            # The trace holds the statistics back until the warm-up time is known, at most warmup_max_held packets
+            self.trace.track_warmup(config.get('warmup_max_held'))
+        else:
+            self.warmup = None
+        self.warmup_detected = False
+        self.no_frames = 0
+        self.no_events = 0
+        self.frame_wait = 0.0
+        self.finished = False
+
+        # Frame-stepped mMTC: the mMTC arrivals are drawn in batches up to mmtc_drawn, see __draw_mmtc_arrivals
+        self.mmtc_frame_stepped = config.get('mmtc_frame_stepped', False)
+        self.mmtc_drawn = self.time
         
         
         #Initial strategy of both slices, will be changed be the decisions
@@ -82,25 +148,30 @@ class Simulation:
         if s2 is not None:
             s2_strategy = s2
         else:
-            s1_strategy = config.get('strategy_s2')
-
-        self.strategy_mapping = {
-            'FCFS': self.__fist_come_first_served,
-            'RR_Q': self.__round_robin_queue_info,
-            'RR_NQ': self.__round_robin_no_queue_info,
-        }
-
-        self.arrival_mapping = {
-            'FCFS': self.__arrival_queue,
-            'RR_Q': self.__arrival_signal,
-            'RR_NQ': self.__arrival_no_queue,
-        }
-        
-        self.event_heap = EventHeap()
-        self.send_queue = {'_URLLC': [], '_mMTC': []}
+            s2_strategy = config.get('strategy_s2')
+        # The scenario keeps the requested strategies, the decisions only change the active ones
+        self.strategies = (s1_strategy, s2_strategy)
+
+        event_queue = config.get('event_queue', 'heap')
+        if event_queue == 'heap':
+            self.event_heap = EventHeap()
+        elif event_queue == 'calendar':
+            # One bucket per frame, departures and decisions are aligned to frames
+            self.event_heap = CalendarQueue(self.frame_length)
+        else:
+            raise ValueError("Unknown event queue backend: {}".format(event_queue))
    
         
-        self.Slices = [Slice(self._URLLC, no_urllc, traffic), Slice(self._mMTC, no_mmtc)]
+        with _gc_paused():
+            if streams is not None:
+                self.Slices = [Slice(self._URLLC, no_urllc, traffic, streams.urllc_arrivals),
+                               Slice(self._mMTC, no_mmtc, rng=streams.mmtc_arrivals)]
+            else:
+                self.Slices = [Slice(self._URLLC, no_urllc, traffic), Slice(self._mMTC, no_mmtc)]
+        mmtc_profile = self.Slices[self._mMTC].profile
+        if self.mmtc_frame_stepped and mmtc_profile.arrival != 'exponential':
+            raise ValueError("Frame-stepped mMTC arrivals need exponential inter-arrival times, not {}"
+                             .format(mmtc_profile.arrival))
         
         #Decision : A dict with all the decisicion that the actuator look up every coherence interval
         #TODO:The initial number of users should follow the traffic distributtion of each slice
@@ -140,24 +211,44 @@ class Simulation:
         self.Decision_prev = 0
    
         
-        #Attributes used by only RR_NQ strategy
-        self.frame_counter = 0
-        self.frame_loops = self.Slices[self._URLLC].get_node(0).deadline / self.frame_length
-        self.node_pointer = 0
-
-        for s in self.Slices:
-            # Initialize nodes and their arrival times
-            self.__initialize_nodes(s)
+        with _gc_paused():
+            for s in self.Slices:
+                if s.type == self._mMTC and self.mmtc_frame_stepped:
+                    continue
+                # Initialize nodes and their arrival times
+                self.__initialize_nodes(s)
+
+        # The handlers are only wrapped when profiling, the run loop is the same either way
+        self.profiler = None
+        if config.get('profiling'):
+            self.profiler = Profiler(self._EVENT_NAMES, self.event_heap.get_size,
+                                     lambda: {'URLLC': len(self.Slices[self._URLLC].deadlines),
+                                              'mMTC': len(self.Slices[self._mMTC].deadlines)})
+            self.__handle_event = self.profiler.time_events(self.__handle_event)
+
+        # Modules defining extra schedulers register them on import
+        for module in config.get('scheduler_modules', []):
+            importlib.import_module(module)
+        self.__event_actions = {
+            self._DEPARTURE: self.__handle_departure,
+            self._REPORT: self.__handle_report,
+            self._DECISION_MAKE: self.__handle_decision_make,
+            self._DECISION_ARRIVAL: self.__handle_decision_arrival
+        }
+        self.__schedulers = {}
+        self.__bind_schedulers()
 
         # Initialize departure event
         self.event_heap.push(self._DEPARTURE, self.time + self.frame_length)
 
         first_send = self.time + self.sampling
-        print("[Event] --> Schedule Report No.1 send at {}".format(first_send))
+        if self.log.event:
+            self.log.debug(EVENT, self.time, "Schedule Report No.1 send at {}", first_send)
         self.event_heap.push(self._REPORT, first_send)
         
         first_report_arrival = first_send + self.get_delay()
-        print("[Event] --> Schedule Report No.1 arrival at MAC layer at {}".format(first_report_arrival))
+        if self.log.event:
+            self.log.debug(EVENT, self.time, "Schedule Report No.1 arrival at MAC layer at {}", first_report_arrival)
         #The first decision will arrive after the report with a delay of RTT&Exec
         self.event_heap.push(self._DECISION_MAKE, first_report_arrival)
 
@@ -172,121 +263,36 @@ class Simulation:
         #
         mu, sigma = 2.26, 0.02
 #        mu, sigma = 1.56, 0.05
-        delay = np.random.lognormal(mu, sigma, 1) / 2.
+        delay = self.delay_rng.lognormal(mu, sigma) / 2.
 #        delay = 0
         return delay
     
 
     def __initialize_nodes(self, _slice):
         nodes = _slice.pool
-        # counter = 0
-        # print("[Time {}] Initial {} nodes.".format(self.time, len(nodes)))
-        for _node in nodes:
-            next_arrival = _node.event_generator.get_init()
-            if _slice.type == self._URLLC:
-                self.stats.stats['no_urllc_arrivals'] += 1
-                counter = self.stats.stats['no_urllc_arrivals']
-            else:
-                self.stats.stats['no_mmtc_arrivals'] += 1
-                counter = self.stats.stats['no_mmtc_arrivals']
-            self.event_heap.push(_slice.type+6,
-                                 self.time + next_arrival, self.time + next_arrival + _node.deadline,
-                                 nodes.index(_node), counter)
+        no_nodes = len(nodes)
+        # Draw the first arrival of all the nodes at once and push them with a single heapify
+        offsets = EventGenerator.init_offsets([_node.event_generator for _node in nodes])
+        if _slice.type == self._URLLC:
+            no_arrivals = 'no_urllc_arrivals'
+        else:
+            no_arrivals = 'no_mmtc_arrivals'
+        first_counter = self.stats.stats[no_arrivals] + 1
+        self.stats.stats[no_arrivals] += no_nodes
+        arrival_times = self.time + offsets
+        self.event_heap.push_many(_slice.type+6,
+                                  arrival_times.tolist(), (arrival_times + _slice.profile.deadline).tolist(),
+                                  range(no_nodes), range(first_counter, first_counter + no_nodes))
 
 #################################################################################################################
 ## Evnets Handling
 #################################################################################################################
     
     def __handle_event(self, event):
-        # Event switcher to determine correct action for an event
-        event_actions = {
-            self._URLLC_ARRIVAL: self.__handle_urllc_arrival,
-            self._mMTC_ARRIVAL: self.__handle_mmtc_arrival,
-            self._DEPARTURE: self.__handle_departure,
-            self._REPORT: self.__handle_report,
-            self._DECISION_MAKE: self.__handle_decision_make,
-            self._DECISION_ARRIVAL: self.__handle_decision_arrival
-        }
-        event_actions[event.type](event)
+        # Event switcher to determine correct action for an event, the arrivals are bound to the schedulers
+        self.__event_actions[event.type](event)
 
-    def __handle_urllc_arrival(self, event):
-        self.arrival_mapping[self.Decision['S1']['strategy']](event)
-        # Handle an alarm arrival event
 
-    def __handle_mmtc_arrival(self, event):
-        self.arrival_mapping[self.Decision['S2']['strategy']](event)
-        # Handle a control arrival event
-
-    def __arrival_queue(self, event):
-        no_arrivals = {
-            self._URLLC_ARRIVAL: 'no_urllc_arrivals',
-            self._mMTC_ARRIVAL: 'no_mmtc_arrivals'
-        }
-        queue_type = {
-            self._URLLC_ARRIVAL: '_URLLC',
-            self._mMTC_ARRIVAL: '_mMTC'
-        }
-        slice_type = {
-            self._URLLC_ARRIVAL: self._URLLC,
-            self._mMTC_ARRIVAL: self._mMTC
-        }
-        self.stats.stats[no_arrivals[event.type]] += 1
-        # print("[Time {}] No. of urllc_arrivals: {}".format(self.time, self.stats.stats['no_urllc_arrivals']))
-
-        # Store event in send queue until departure (as LIFO)
-        self.send_queue[queue_type[event.type]].append(event)
-        node = self.Slices[slice_type[event.type]].get_node(event.node_id)
-        # store the event in the node's departure queue (this is the queue not maintained by the base station)
-        node.push_event(event)
-
-        next_arrival = node.event_generator.get_next()
-        self.event_heap.push(event.type,
-                             self.time + next_arrival, self.time + next_arrival + node.deadline,
-                             event.node_id, self.stats.stats[no_arrivals[event.type]])
-
-    def __arrival_signal(self, event):
-        no_arrivals = {
-            self._URLLC_ARRIVAL: 'no_urllc_arrivals',
-            self._mMTC_ARRIVAL: 'no_mmtc_arrivals'
-        }
-        slice_type = {
-            self._URLLC_ARRIVAL: self._URLLC,
-            self._mMTC_ARRIVAL: self._mMTC
-        }
-        self.stats.stats[no_arrivals[event.type]] += 1
-        # print("[Time {}] No. of mmtc_arrivals: {}".format(self.time, self.stats.stats['no_mmtc_arrivals']))
-        node = self.Slices[slice_type[event.type]].get_node(event.node_id)
-        node.active = True
-        # store the event in the node's departure queue (this is the queue not maintained by the base station)
-        node.push_event(event)
-
-        next_arrival = node.event_generator.get_next()
-        self.event_heap.push(event.type,
-                             self.time + next_arrival, self.time + next_arrival + node.deadline,
-                             event.node_id, self.stats.stats[no_arrivals[event.type]])
-
-    def __arrival_no_queue(self, event):
-        no_arrivals = {
-            self._URLLC_ARRIVAL: 'no_urllc_arrivals',
-            self._mMTC_ARRIVAL: 'no_mmtc_arrivals'
-        }
-        slice_type = {
-            self._URLLC_ARRIVAL: self._URLLC,
-            self._mMTC_ARRIVAL: self._mMTC
-        }
-        self.stats.stats[no_arrivals[event.type]] += 1
-        # print("[Time {}] No. of mmtc_arrivals: {}".format(self.time, self.stats.stats['no_mmtc_arrivals']))
-        # Store event in send queue until departure (as LIFO)
-        node = self.Slices[slice_type[event.type]].get_node(event.node_id)
-        # store the event in the node's departure queue (this is the queue not maintained by the base station)
-        node.push_event(event)
-
-        next_arrival = node.event_generator.get_next()
-        self.event_heap.push(event.type,
-                             self.time + next_arrival, self.time + next_arrival + node.deadline,
-                             event.node_id, self.stats.stats[no_arrivals[event.type]])
-
-    
     def __handle_report(self, event):
         """
         Report is sent every sampling time
@@ -318,106 +324,89 @@ class Simulation:
         # print("[Time {}] Departure".format(self.time))
         # print("[Time {}] Send queue size {}" .format(self.time, len(self.send_queue)))
         del event
+        if self.mmtc_frame_stepped:
+            self.__draw_mmtc_arrivals()
         self.__handle_expired_events()
         self.no_pilots = 12
         self.stats.stats['no_pilots'] += 12
         self.__assign_pilots()
+        self.no_frames += 1
+        if self.warmup is not None:
+            self.__observe_frame()
         self.event_heap.push(self._DEPARTURE, self.time + self.frame_length)
 
+    def __draw_mmtc_arrivals(self):
+        """
+        Frame-stepped mMTC: draw and queue all the mMTC arrivals since the last draw at once
 
-    def __handle_expired_events(self):
+        The arrivals of every node form a Poisson process, their superposition over the interval is a Poisson
+        number of arrivals at uniform times, each from a uniformly drawn node. Called before the mMTC queue is
+        read, at the departures and the reports. The whole batch goes to the mMTC scheduler active at the draw.
         """
-        Handle all the expired requests before assigning the pilots every coherence interval
+        interval = self.time - self.mmtc_drawn
+        if interval <= 0:
+            return
+        _slice = self.Slices[self._mMTC]
+        rng = _slice.stream.rng
+        rate = _slice.no_nodes / _slice.profile.arrival_parameter.get('mean_arrival_time')
+        no_arrivals = int(rng.poisson(rate * interval))
+        if no_arrivals > 0:
+            arrival_times = np.sort(self.mmtc_drawn + interval * rng.random(no_arrivals))
+            if isinstance(rng, np.random.Generator):
+                node_ids = rng.integers(0, _slice.no_nodes, no_arrivals)
+            else:
+                # The global np.random state, without streams
+                node_ids = rng.randint(0, _slice.no_nodes, no_arrivals)
+            dead_times = arrival_times + _slice.profile.deadline
+            first_counter = self.stats.stats['no_mmtc_arrivals'] + 1
+            self.stats.stats['no_mmtc_arrivals'] += no_arrivals
+            counters = range(first_counter, first_counter + no_arrivals)
+            enqueue = self.__active[self._mMTC].enqueue
+            for arrival_time, dead_time, node_id, counter in zip(arrival_times.tolist(), dead_times.tolist(),
+                                                                 node_ids.tolist(), counters):
+                enqueue(Event(self._mMTC_ARRIVAL, arrival_time, dead_time, node_id, counter))
+        self.mmtc_drawn = self.time
+
+    def __observe_frame(self):
         """
-
-        self.__handle_urllc_expired_events()
-        self.__handle_mmtc_expired_events()
+        Feed the per-frame queue lengths and waiting time to the warm-up detector, and check whether enough
+        steady state samples have been collected
+        """
+        wait = self.trace.pop_frame_wait()
+        if wait is not None:
+            self.frame_wait = wait
+        detected = self.warmup.observe(self.time,
+                                       urllc_queue=len(self.Slices[self._URLLC].deadlines),
+                                       mmtc_queue=len(self.Slices[self._mMTC].deadlines),
+                                       wait=self.frame_wait)
+        if not detected and self.trace.held_full:
+            # The trace cannot hold more packets back, the warm-up ends at the truncation point found so far
+            self.warmup.force()
+            detected = True
+            if self.log.event:
+                self.log.debug(EVENT, self.time, "Warm-up detection stopped, {} packets held back",
+                               self.trace.max_held)
+        if not detected:
+            return
+        if not self.warmup_detected:
+            # The detection is final, the trace gets the warm-up time once
+            self.warmup_detected = True
+            self.trace.warmup_time = self.warmup.warmup_time
+            if self.log.event:
+                self.log.debug(EVENT, self.time, "Warm-up detected, ends at {}", self.warmup.warmup_time)
+        if self.steady_state_samples is not None and self.no_frames % self.warmup.check_interval == 0:
+            if self.trace.count_samples(self.warmup.warmup_time) >= self.steady_state_samples:
+                self.finished = True
 
 
-    def __handle_urllc_expired_events(self):
+    def __handle_expired_events(self):
         """
-        remove the expired events in the send_queue
+        Handle all the expired requests before assigning the pilots every coherence interval
         """
-        
-        pilot_strategy = self.Decision['S1']['strategy']
-        if pilot_strategy == "FCFS":
-            self.__handle_station_node_queue(self._URLLC)
-        if pilot_strategy == "RR_Q":
-            self.__handle_signaling(self._URLLC)
-        if pilot_strategy == "RR_NQ":
-            self.__handle__node_queue(self._URLLC)
-
-
-    def __handle_mmtc_expired_events(self):
-        pilot_strategy = self.Decision['S2']['strategy']
-        if pilot_strategy == "FCFS":
-            self.__handle_station_node_queue(self._mMTC)
-        if pilot_strategy == "RR_Q":
-            self.__handle_signaling(self._mMTC)
-        if pilot_strategy == "RR_NQ":
-            self.__handle__node_queue(self._mMTC)
-
-
-    def __handle_station_node_queue(self, slice_type):
-        key = ['_URLLC', '_mMTC']
-        no_missed_event = ['no_missed_urllc', 'no_missed_mmtc']
-        queue = self.send_queue[key[slice_type]]
-
-        queue_length = len(queue)
-        remove_indices = []
-
-        for i in range(queue_length):
-            event = queue[i]
-            if event.dead_time < self.time:
-                remove_indices.append(i)
-        print("{} {} requests expired, remove.".format(len(remove_indices), key[slice_type]))
-        if slice_type == self._URLLC and len(remove_indices) > 0:
-            k = input("URLLC loss, pause for observe!")
-        # Remove the events in reversed order to not shift subsequent indices
-        for i in sorted(remove_indices, reverse=True):
-            event = queue[i]
-            node = self.Slices[slice_type].get_node(event.node_id)
-            node.remove_event(event)
-            self.stats.stats[no_missed_event[slice_type]] += 1
-            entry = event.get_entry(self.time, False)
-            print("[Event][{}] {} request expired, arrive at {}, deadline {}".format(self.time, key[slice_type], entry['arrival_time'], entry['dead_time']))
-            self.trace.write_trace(entry)
-            del event
-            del self.send_queue[key[slice_type]][i]
-
-        # if len(remove_indices) > 0:
-        #       print("\n[Time {}] Lost {} URLLC packets, {} mMTC packets\n"
-        #               .format(self.time, urllc_counter, mmtc_counter))
-
-
-    def __handle_signaling(self, slice_type):
-        no_missed_event = ['no_missed_urllc', 'no_missed_mmtc']
-        for node in self.Slices[slice_type].pool:
-            if node.active:
-                for event in node.request_queue:
-                    if event.dead_time < self.time:
-                        node.remove_event(event)
-                        self.stats.stats[no_missed_event[slice_type]] += 1
-                        entry = event.get_entry(self.time, False)
-                        self.trace.write_trace(entry)
-                        del event
-            if len(node.request_queue) == 0:
-                node.active = False
-
-
-    def __handle__node_queue(self, slice_type):
-        no_missed_event = ['no_missed_urllc', 'no_missed_mmtc']
-        for node in self.Slices[slice_type].pool:
-            if len(node.request_queue) > 0:
-                for event in node.request_queue:
-                    if event.dead_time < self.time:
-                        node.remove_event(event)
-                        self.stats.stats[no_missed_event[slice_type]] += 1
-                        entry = event.get_entry(self.time, False)
-                        self.trace.write_trace(entry)
-                        del event
-                        
-#################################################################################################################
+
+        for scheduler in self.__active:
+            scheduler.expire()
+
 ## Methods
 #################################################################################################################
     
@@ -426,17 +415,12 @@ class Simulation:
         Send the report every sampling time, read the time of the old report
         """
         self.report_counter += 1
-        print("[PHY]{} --> Report No.{} sent".format(self.time, self.report_counter))
-        no_arrivals = {
-            self._URLLC_ARRIVAL: 'no_urllc_arrivals',
-            self._mMTC_ARRIVAL: 'no_mmtc_arrivals'
-        }
-        
-#        report_urllc = self.stats.stats[no_arrivals[self._URLLC_ARRIVAL]]
-#        report_mmtc = self.stats.stats[no_arrivals[self._mMTC_ARRIVAL]]
-        
-        report_urllc = len(self.send_queue['_URLLC'])
-        report_mmtc = len(self.send_queue['_mMTC'])
+        if self.log.phy:
+            self.log.debug(PHY, self.time, "Report No.{} sent", self.report_counter)
+        if self.mmtc_frame_stepped:
+            self.__draw_mmtc_arrivals()
+        report_urllc = len(self.Slices[self._URLLC].deadlines)
+        report_mmtc = len(self.Slices[self._mMTC].deadlines)
         
         Report_Sending = {'time': self.time,
                         'counter': self.report_counter,
@@ -447,20 +431,27 @@ class Simulation:
         }
         self.report_queue.append(Report_Sending)
         next_send = self.time + self.sampling
-        print("[Event] --> Schedule the next Report No.{} send at {}".format(Report_Sending['counter']+1, next_send))
+        if self.log.event:
+            self.log.debug(EVENT, self.time, "Schedule the next Report No.{} send at {}",
+                           Report_Sending['counter']+1, next_send)
         self.event_heap.push(self._REPORT, next_send)
         next_report_arrive = next_send +  self.get_delay()
-        print("[Event] --> Schedule the next Report No.{} arrive at the MAC layer at {}".format(Report_Sending['counter']+1, next_report_arrive))
+        if self.log.event:
+            self.log.debug(EVENT, self.time, "Schedule the next Report No.{} arrive at the MAC layer at {}",
+                           Report_Sending['counter']+1, next_report_arrive)
         self.event_heap.push(self._DECISION_MAKE, next_report_arrive)
 
     
     def __update_report(self):
         """Process the decision on the MAC and send out"""
         self.Report = self.report_queue.pop(0)
-        print("[MAC]{} --> Report No.{} arrives".format(self.time, self.Report['counter']))
         interval = self.Report['time'] - self.Report_prev['time']
-        print("[MAC]{} --> Last Report time: {}, This Report time: {}, report interval: {}".format(self.time, self.Report_prev['time'], self.Report['time'], interval))
-        print("[MAC]{} --> Last Respot urllc {}, this Report urllc {}".format(self.time, self.Report_prev['S1']['users'], self.Report['S1']['users']))
+        if self.log.mac:
+            self.log.debug(MAC, self.time, "Report No.{} arrives", self.Report['counter'])
+            self.log.debug(MAC, self.time, "Last Report time: {}, This Report time: {}, report interval: {}",
+                           self.Report_prev['time'], self.Report['time'], interval)
+            self.log.debug(MAC, self.time, "Last Respot urllc {}, this Report urllc {}",
+                           self.Report_prev['S1']['users'], self.Report['S1']['users'])
         
         urllc_arrivals  = self.Report['S1']['users'] - self.Report_prev['S1']['users']
         mmtc_arrivals  = self.Report['S2']['users'] - self.Report_prev['S2']['users']
@@ -483,7 +474,9 @@ class Simulation:
         }
         self.Report_prev = self.Report
         decision_arrival = self.time + self.get_delay()
-        print("[Event] --> Schedule the Decision No.{} arrive at the PHY layer at {}".format(self.Decision_Sending['counter'], decision_arrival))
+        if self.log.event:
+            self.log.debug(EVENT, self.time, "Schedule the Decision No.{} arrive at the PHY layer at {}",
+                           self.Decision_Sending['counter'], decision_arrival)
         self.event_heap.push(self._DECISION_ARRIVAL, decision_arrival)
 
         
@@ -493,13 +486,17 @@ class Simulation:
         
         self.Decision = self.Decision_Sending
 
-        print("[PHY]{} --> Decision No.{} arrives".format(self.time, self.Decision['counter']))
-        print("[PHY]{} --> Last decision arrives at {}, This decision arrives at: {}. Decision arrival  interval: {}".format(self.time, self.Decision_prev, self.time, self.Decision_prev - self.time))
-        
-        print("[PHY]{} --> New Decision: Scheduled URLLC:{} | Scheduled mMTC {}\n".format(self.time, self.Decision['S1']['users'], self.Decision['S2']['users']))
+        if self.log.phy:
+            self.log.debug(PHY, self.time, "Decision No.{} arrives", self.Decision['counter'])
+            self.log.debug(PHY, self.time, "Last decision arrives at {}, This decision arrives at: {}. "
+                                           "Decision arrival  interval: {}",
+                           self.Decision_prev, self.time, self.Decision_prev - self.time)
+            self.log.debug(PHY, self.time, "New Decision: Scheduled URLLC:{} | Scheduled mMTC {}",
+                           self.Decision['S1']['users'], self.Decision['S2']['users'])
         
         # Update the previous report
         self.Decision_prev = self.time
+        self.__bind_schedulers()
         
     def __assign_pilots(self):
         self.__assign_urllc_pilots()
@@ -508,206 +505,121 @@ class Simulation:
 
     def __assign_urllc_pilots(self):
         no_urllc = self.Decision['S1']['users']
-        print("[PHY] Take Decision No. {}. Assigned {} URLLC requests".format(self.Decision['counter'], no_urllc))
-        self.strategy_mapping[self.Decision['S1']['strategy']](self._URLLC, no_urllc)
+        if self.log.phy:
+            self.log.debug(PHY, self.time, "Take Decision No. {}. Assigned {} URLLC requests",
+                           self.Decision['counter'], no_urllc)
+        self.__active[self._URLLC].assign(no_urllc)
 
     def __assign_mmtc_pilots(self):
         no_mmtc = self.Decision['S2']['users']
-        print("[PHY] Take Decision No. {}. Assigned {} mMTC requests".format(self.Decision['counter'], no_mmtc))
-        self.strategy_mapping[self.Decision['S2']['strategy']](self._mMTC, no_mmtc)
-
-    def __fist_come_first_served(self, slice_type, requests):
-        no_pilots = self.no_pilots
-        key = ['_URLLC', '_mMTC']
-        events = self.send_queue[key[slice_type]].copy()
-        print("[PHY] Number of active {} request in the queue: {}".format(key[slice_type], len(events)))
-        events.sort(key=lambda x: x.dead_time)
-        counter = requests
-        while counter > 0 and no_pilots > 0:
-            required_pilots = 1
-            try:
-                event = events.pop(0)
-                node = self.Slices[slice_type].get_node(event.node_id)
-                required_pilots = node.pilot_samples
-                no_pilots -= required_pilots
-                counter -= 1
-                if no_pilots >= 0:
-                    # remove the event that assigned the pilots from the list
-                    entry = event.get_entry(self.time, True)
-                    print("[Event][{}] {} Request allocated, arrive at {}, deadline {}".format(self.time, key[slice_type] , entry['arrival_time'], entry['dead_time']))
-                    # print(entry)
-                    self.trace.write_trace(entry)
-                    self.send_queue[key[slice_type]].remove(event)
-                    self.Slices[slice_type].get_node(event.node_id).remove_event(event)
-                    # print(no_pilots, len(self.send_queue['_URLLC']), len(urllc_events))
-                else:
-                    # print("pilot not enough")
-                    no_pilots += required_pilots
-                    self.no_pilots = no_pilots
-                    return
-            except:
-                counter -= 1
-                no_pilots -= required_pilots
-                if no_pilots >= 0:
-                    print("[Event][{}] No {} requests in the queue, {} pilots wastes".format(self.time, key[slice_type], required_pilots))
-                    self.stats.stats['no_waste_pilots'] += required_pilots
-                else:
-                    no_pilots += required_pilots
-                    self.no_pilots = 0
-                    return
-        self.no_pilots = no_pilots
-
-    def __round_robin_queue_info(self, slice_type, requests):
-        no_pilots = self.no_pilots
-        _nodes = self.Slices[slice_type].pool
-        counter = requests
-        for _node in self.Slices[slice_type].pool:
-            if _node.active:
-                for event in _node.request_queue:
-                    no_pilots -= _node.pilot_samples
-                    if no_pilots >= 0 and counter >= 0:
-                        entry = event.get_entry(self.time, True)
-                        counter -= 1
-                        self.trace.write_trace(entry)
-                        _node.remove_event(event)
-                        del event
-                        if len(_node.request_queue) == 0:
-                            _node.active = False
-                    else:
-                        no_pilots += _node.pilot_samples
-                        self.no_pilots = no_pilots
-                        return
-        self.no_pilots = no_pilots
-
-    def __round_robin_no_queue_info(self, slice_type, requests):
-        assert slice_type == self._URLLC, "Method only applicable for slice 1"
-        self.frame_counter = (self.frame_counter + 1) % self.frame_loops
-        if self.frame_counter == 1:
-            self.node_pointer = 0
-        start_ind = self.node_pointer
-        no_pilots = self.no_pilots
-        counter = requests
-        for i in range(start_ind, len(self.Slices[self._URLLC].pool)):
-            _node = self.Slices[self._URLLC].get_node(i)
-            no_pilots -= _node.pilot_samples
-            if no_pilots >= 0 and counter >= 0:
-                self.node_pointer += 1
-                if len(_node.request_queue) > 0:
-                    counter -= 1
-                    event = self.Slices[self._URLLC].get_node(i).request_queue.pop(0)
-                    entry = event.get_entry(self.time, True)
-                    self.trace.write_trace(entry)
-            else:
-                no_pilots += _node.pilot_samples
-                self.no_pilots = no_pilots
-                return
-        self.no_pilots = no_pilots
+        if self.log.phy:
+            self.log.debug(PHY, self.time, "Take Decision No. {}. Assigned {} mMTC requests",
+                           self.Decision['counter'], no_mmtc)
+        self.__active[self._mMTC].assign(no_mmtc)
+
+    def __get_scheduler(self, name, slice_type):
+        """ Scheduler instance of a strategy for a slice, created the first time it is selected """
+        scheduler = self.__schedulers.get((name, slice_type))
+        if scheduler is None:
+            scheduler = get_scheduler(name)(self, slice_type)
+            if self.profiler is not None:
+                scheduler.assign = self.profiler.time_calls(name, scheduler.assign)
+            self.__schedulers[(name, slice_type)] = scheduler
+        return scheduler
+
+    def __bind_schedulers(self):
+        """ Bind the schedulers of the current decision, so no strategy is looked up per event """
+        self.__active = (self.__get_scheduler(self.Decision['S1']['strategy'], self._URLLC),
+                         self.__get_scheduler(self.Decision['S2']['strategy'], self._mMTC))
+        self.__event_actions[self._URLLC_ARRIVAL] = self.__active[self._URLLC].arrival
+        self.__event_actions[self._mMTC_ARRIVAL] = self.__active[self._mMTC].arrival
         
+
 #################################################################################################################
 ## Simulation Run
 #################################################################################################################
 
     def run(self):
         """ Runs the simulation """
-        event_map = {
-            self._URLLC_ARRIVAL: "URLLC_ARRIVAL",
-            self._mMTC_ARRIVAL: "mMTC_ARRIVAL",
-            self._DEPARTURE: "ALLOCATION",
-            self._REPORT: "SEND_REPORT",
-            self._DECISION_MAKE: "REC_REPORT_AND_SEND_DECISION ",
-            self._DECISION_ARRIVAL:"DECISION_ARRIVAL"
-        }
-        current_progress = 0
-        print("\n[Time {}] Simulation start.".format(self.time))
+        if self.log.event:
+            self.log.debug(EVENT, self.time, "Simulation start.")
 #        print("Size: {}".format(self.event_heap.get_size()))
         # for k in self.event_heap.get_heap():
         #     print(k)
-        while self.time <= self.simulation_length:
+        if self.profiler is not None:
+            self.profiler.start()
+        while self.time <= self.simulation_length and not self.finished:
 #            print("[Time {}] Event heap size {}".format(self.time, self.event_heap.size()))
             next_event = self.event_heap.pop()[3]
+            self.no_events += 1
             # print("Handle event: {} generated at time {}".format(next_event.type, next_event.time))
 
             # Advance time before handling event
             self.time = next_event.time
-            progress = np.round(100 * self.time / self.simulation_length)
-
-            if progress > current_progress:
-                current_progress = progress
-#                str1 = "\rProgress: {0}%".format(progress)
-#                sys.stdout.write(str)
-#                sys.stdout.flush()
-#            if next_event.type not in [self._URLLC_ARRIVAL, self._mMTC_ARRIVAL]:
-#                print("[Event]{} New {} event, press any key to handle".format(self.time, event_map[next_event.type]))
-#                input()
             self.__handle_event(next_event)
 
-        print('\n[Time {}] Simulation complete.'.format(self.time))
-
-    def write_result(self):
-        result_dir = "results/" + self.Decision['S1']['strategy'] + "_" + self.Decision['S2']['strategy']
-        reliability = self.Slices[self._URLLC].get_node(0).reliability_profile
-        deadline = self.Slices[self._URLLC].get_node(0).deadline_profile
-        urllc_file_name = result_dir + "/" + reliability + "_" + deadline + "_" + str(self.mu)+"_URLLC.csv"
-        mmtc_file_name = result_dir + "/" + reliability + "_" + deadline + "_" + str(self.mu)+"_mMTC.csv"
+        if self.profiler is not None:
+            self.profiler.stop()
+        if self.log.event:
+            self.log.debug(EVENT, self.time, "Simulation complete.")
 
+    def get_summary(self):
+        """
+        Summary statistics of the run, to be called after trace.process()
+
+        Returns
+        -------
+        dict
+            Requested strategies, traffic and node counts of the scenario, the strategies of the last decision,
+            waiting time (mean, var, confidence interval) and loss rate of both slices, the ratio of wasted
+            pilots, and the waiting time percentiles and serialized waiting time histograms of both slices
+        """
         data = self.trace.get_waiting_time()
-        waste = self.stats.stats['no_waste_pilots'] / self.stats.stats['no_pilots']
-
-        try:
-            os.mkdir(result_dir)
-        except OSError:
-            pass
-            # print("Directory exists")
-
-        try:
-            file = open(urllc_file_name, 'a')
-            file.write(str(self.Slices[0].no_nodes) + ','
-                       + str(self.Slices[1].no_nodes) + ','
-                       + str(data[0][0]) + ','
-                       + str(data[0][1]) + ','
-                       + str(data[0][2]) + ','
-                       + str(data[0][3]) + ','
-                       + str(self.trace.get_loss_rate()[0]) + ','
-                       + str(waste) + '\n'
-                       )
-        except FileNotFoundError:
-            print("No file found, create the file first")
-            file = open(urllc_file_name, 'w+')
-            file.write("No.URLLC,No.mMTC,mean,var,conf_inter_up,conf_inter_low,loss,waste\n")
-            file.write(str(self.Slices[0].no_nodes) + ','
-                       + str(self.Slices[1].no_nodes) + ','
-                       + str(data[0][0]) + ','
-                       + str(data[0][1]) + ','
-                       + str(data[0][2]) + ','
-                       + str(data[0][3]) + ','
-                       + str(self.trace.get_loss_rate()[0]) + ','
-                       + str(waste) + '\n'
-                       )
-        file.close()
-        try:
-            file = open(mmtc_file_name, 'a')
-            file.write(str(self.Slices[0].no_nodes) + ','
-                       + str(self.Slices[1].no_nodes) + ','
-                       + str(data[1][0]) + ','
-                       + str(data[1][1]) + ','
-                       + str(data[1][2]) + ','
-                       + str(data[1][3]) + ','
-                       + str(self.trace.get_loss_rate()[1]) + ','
-                       + str(waste) + '\n'
-                       )
-        except FileNotFoundError:
-            print("No file found, create the file first")
-            file = open(mmtc_file_name, 'w+')
-            file.write("No.URLLC,No.mMTC,mean,var,conf_inter_up,conf_inter_low,loss\n")
-            file.write(str(self.Slices[0].no_nodes) + ','
-                       + str(self.Slices[1].no_nodes) + ','
-                       + str(data[1][0]) + ','
-                       + str(data[1][1]) + ','
-                       + str(data[1][2]) + ','
-                       + str(data[1][3]) + ','
-                       + str(self.trace.get_loss_rate()[1]) + ','
-                       + str(waste) + '\n'
-                       )
-        file.close()
-
+        loss = self.trace.get_loss_rate()
+        percentiles = self.trace.get_percentiles()
+        return {'s1': self.strategies[self._URLLC],
+                's2': self.strategies[self._mMTC],
+                'reliability': self.Slices[self._URLLC].profile.reliability_profile,
+                'deadline': self.Slices[self._URLLC].profile.deadline_profile,
+                'mu': self.mu,
+                'no_urllc': self.Slices[self._URLLC].no_nodes,
+                'no_mmtc': self.Slices[self._mMTC].no_nodes,
+                'final_s1': self.Decision['S1']['strategy'],
+                'final_s2': self.Decision['S2']['strategy'],
+                'urllc_wait': data[0],
+                'mmtc_wait': data[1],
+                'urllc_loss': loss[0],
+                'mmtc_loss': loss[1],
+                'waste': self.stats.stats['no_waste_pilots'] / self.stats.stats['no_pilots'],
+                'urllc_percentiles': percentiles[0],
+                'mmtc_percentiles': percentiles[1],
+                'urllc_histogram': self.trace.histograms[self._URLLC_ARRIVAL].to_dict(),
+                'mmtc_histogram': self.trace.histograms[self._mMTC_ARRIVAL].to_dict(),
+                'warmup_time': self.trace.warmup_time,
+                'end_time': self.time,
+                'profile': self.profiler.get_summary() if self.profiler is not None else None}
+
+    def write_result(self, seed=None):
+        """ Store the summary of the run in the results database, with the seed of the run if known, and return it """
+        summary = self.get_summary()
+        summary['seed'] = seed
+        self.save_summary(summary)
+        return summary
+
+    @staticmethod
+    def save_summary(summary, results=None):
+        """
+        Store a summary from get_summary in the results database
 
+        Parameters
+        ----------
+        summary : dict
+            Summary of a run, with its seed under 'seed' if known
+        results : ResultsDB
+            Open database the summary is buffered in, by default it is written at once to RESULTS_DB
+        """
+        if results is not None:
+            results.insert(summary)
+            return
+        with ResultsDB(RESULTS_DB, batch_size=1) as results:
+            results.insert(summary)
@@ -4,7 +4,9 @@ Define slice types for customer groups: URLLC and mMTC
 
 __author__ = "Haorui Peng"
 
-from nodes.node import Node
+from nodes.node import Node, NodeProfile
+from events.event_generator import VariateStream
+from events.deadline_queue import DeadlineQueue
 import json
 
 
@@ -17,16 +19,30 @@ class Slice:
     type : URLLC or mMTC
     no_nodes : The number of UEs subscribed to the slice
     traffic : high reliability, low reliability, short deadline, long deadline
+    profile : NodeProfile
+        Traffic profile shared by all the nodes of the slice
+    stream : VariateStream
+        Source of the random variates shared by the event generators of all the nodes, drawn from rng
+        (numpy.random.Generator) or from the global np.random state if rng is None
+    deadlines : DeadlineQueue
+        Index of all the requests queued in the nodes of the slice, ordered by dead time
+    active_nodes : bytearray
+        One flag per node of the pool, set while the node has queued requests, the schedulers find the next
+        active node with a single scan of the flags instead of visiting every node of the pool
 
     """
 
     _URLLC = 0
     _mMTC = 1
 
-    def __init__(self, slice_type, no_nodes, traffic=None):
+    def __init__(self, slice_type, no_nodes, traffic=None, rng=None):
         self.type = slice_type
         self.no_nodes = no_nodes
-        self.pool = [Node(self.type, traffic) for i in range(self.no_nodes)]
+        self.stream = VariateStream(rng=rng)
+        self.profile = NodeProfile(self.type, traffic)
+        self.pool = [Node(self.type, traffic, self.stream, self.profile) for i in range(self.no_nodes)]
+        self.deadlines = DeadlineQueue()
+        self.active_nodes = bytearray(self.no_nodes)
 
     def get_node(self, node_id):
         return self.pool[node_id]
@@ -34,4 +50,65 @@ class Slice:
     def get_index(self, node):
         return self.pool.index(node)
 
+    def push_event(self, event):
+        """ Queue a request in its node and in the deadline index, the node becomes active """
+        node = self.pool[event.node_id]
+        if not node.request_queue:
+            node.active = True
+            self.active_nodes[event.node_id] = 1
+        node.push_event(event)
+        self.deadlines.push(event)
+
+    def remove_event(self, event):
+        """ Remove a request from its node and from the deadline index, the node is inactive once empty """
+        node = self.pool[event.node_id]
+        node.remove_event(event)
+        if not node.request_queue:
+            node.active = False
+            self.active_nodes[event.node_id] = 0
+        self.deadlines.remove(event)
+
+    def pop_event(self):
+        """
+        Remove and return the request with the earliest dead time from its node and from the deadline index
+
+        Raises
+        ------
+        IndexError
+            If no request is queued in the slice
+        """
+        event = self.deadlines.pop()
+        node = self.pool[event.node_id]
+        node.remove_event(event)
+        if not node.request_queue:
+            node.active = False
+            self.active_nodes[event.node_id] = 0
+        return event
+
+    def next_active(self, node_id):
+        """ Returns the id of the first active node after the given one, None if there is none """
+        index = self.active_nodes.find(1, node_id + 1)
+        if index < 0:
+            return None
+        return index
+
+    def pop_expired(self, time):
+        """
+        Remove all the requests queued in the nodes with a dead time before the given time
+
+        Returns
+        -------
+        list
+            The expired requests, earliest dead time first
+        """
+        expired = self.deadlines.pop_expired(time)
+        for event in expired:
+            node = self.pool[event.node_id]
+            # The first expired request of a node drops all of them at once, the next ones find none left
+            if node.request_queue:
+                node.pop_expired(time)
+                if not node.request_queue:
+                    node.active = False
+                    self.active_nodes[event.node_id] = 0
+        return expired
 
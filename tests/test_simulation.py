@@ -0,0 +1,25 @@
+import json
+import numpy as np
+from utilities.stats import Stats
+from utilities.trace import Trace, next_prime
+from simulation import Simulation
+
+
+def get_config(**settings):
+    with open('default_config.json') as config_file:
+        config = json.load(config_file)
+    config['simulation_length'] = 20
+    config['run_cache'] = None
+    config.update(settings)
+    return config
+
+
+def test_frame_stepped_without_streams():
+    # Without RandomStreams the arrivals are drawn from the global np.random state
+    np.random.seed(1)
+    stats = Stats(None)
+    trace = Trace(None, next_prime(12))
+    simulation = Simulation(get_config(mmtc_frame_stepped=True), stats, trace, 12, 600, 2.26, 'FCFS', 'FCFS',
+                            ('low', 'short'))
+    simulation.run()
+    assert stats.stats['no_mmtc_arrivals'] > 0
@@ -0,0 +1,27 @@
+import json
+from utilities.stats import Stats
+from utilities.trace import Trace, next_prime
+from utilities.random_streams import RandomStreams
+from simulation import Simulation
+
+
+def run_simulation(streaming):
+    with open('default_config.json') as config_file:
+        config = json.load(config_file)
+    config['simulation_length'] = 20
+    config['run_cache'] = None
+    streams = RandomStreams(1)
+    trace = Trace(None, next_prime(12), rng=streams.sampling, streaming=streaming)
+    Simulation(config, Stats(None), trace, 12, 600, 2.26, 'FCFS', 'FCFS', ('low', 'short'), streams).run()
+    trace.process()
+    return trace
+
+
+def test_print_results_streaming(capsys):
+    run_simulation(False).print_results()
+    buffered = capsys.readouterr().out.splitlines()
+    run_simulation(True).print_results()
+    streaming = capsys.readouterr().out.splitlines()
+    # Same run: the streaming estimators count the same URLLC and mMTC packets as the buffered trace
+    for buffered_line, streaming_line in zip(buffered[2:4], streaming[2:4]):
+        assert buffered_line.split('|')[:2] == streaming_line.split('|')[:2]
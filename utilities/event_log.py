@@ -0,0 +1,104 @@
+import collections
+import logging
+
+PHY = 'PHY'
+MAC = 'MAC'
+EVENT = 'EVENT'
+SCHED = 'SCHED'
+
+SUBSYSTEMS = (PHY, MAC, EVENT, SCHED)
+
+
+class EventLog:
+    """
+    Leveled event logging per subsystem, on top of the standard logging module
+
+    Every subsystem logs to the logger "<name>.<subsystem>", so its level and handlers can be set like any other
+    logger. The attributes phy, mac, event and sched tell whether a debug record of the subsystem would be used
+    at all, call sites check them before building the message, so a disabled subsystem only costs an attribute
+    lookup:
+
+        if log.sched:
+            log.debug(SCHED, time, "{} requests expired", len(expired))
+
+    Optionally the last records of all subsystems are kept in an in-memory ring buffer, unformatted, and dumped
+    with a warning when an anomaly is reported.
+
+    Attributes
+    ----------
+    phy, mac, event, sched : bool
+        Whether debug records of the subsystem are logged or kept in the ring buffer
+    """
+
+    def __init__(self, levels=None, ring_size=0, name='slicing'):
+        """
+        Parameters
+        ----------
+        levels : dict
+            Level of each subsystem, as a logging level or its name, e.g. {"PHY": "DEBUG"}. Subsystems that are
+            left out inherit the level of the parent loggers
+        ring_size : int
+            Number of records kept in the ring buffer, 0 to disable it
+        name : str
+            Name of the parent logger
+        """
+
+        levels = levels if levels is not None else {}
+        self.__ring = collections.deque(maxlen=ring_size) if ring_size > 0 else None
+        self.__loggers = {}
+        for subsystem in SUBSYSTEMS:
+            logger = logging.getLogger(name + '.' + subsystem)
+            if levels.get(subsystem) is not None:
+                logger.setLevel(levels[subsystem])
+            self.__loggers[subsystem] = logger
+        self.update()
+
+    def update(self):
+        """ Recompute the subsystem switches, to be called after changing the logger levels """
+
+        for subsystem, logger in self.__loggers.items():
+            enabled = self.__ring is not None or logger.isEnabledFor(logging.DEBUG)
+            setattr(self, subsystem.lower(), enabled)
+
+    def debug(self, subsystem, time, message, *args):
+        """
+        Log a debug record, message is formatted with str.format(*args) only if it is emitted
+
+        Parameters
+        ----------
+        subsystem : str
+            One of PHY, MAC, EVENT and SCHED
+        time : float
+            Simulation time of the record
+        message : str
+            Format string of the record
+        """
+
+        if self.__ring is not None:
+            self.__ring.append((time, subsystem, message, args))
+        logger = self.__loggers[subsystem]
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(self.__format(time, subsystem, message, args))
+
+    def anomaly(self, subsystem, time, message, *args):
+        """
+        Log a warning record, then dump and clear the ring buffer so the events leading to it can be inspected
+
+        Without the ring buffer there is nothing to dump, and anomalies such as URLLC losses are routine in long
+        runs and sweeps, so the record is only logged as a debug record.
+        """
+
+        if self.__ring is None:
+            self.debug(subsystem, time, message, *args)
+            return
+        logger = self.__loggers[subsystem]
+        logger.warning(self.__format(time, subsystem, message, args))
+        if self.__ring:
+            logger.warning("Last {} events:".format(len(self.__ring)))
+            for record in self.__ring:
+                logger.warning("    " + self.__format(*record))
+            self.__ring.clear()
+
+    @staticmethod
+    def __format(time, subsystem, message, args):
+        return "[{}][{}] {}".format(subsystem, time, message.format(*args))
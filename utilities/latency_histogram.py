@@ -0,0 +1,163 @@
+import math
+
+# Percentiles reported in the summaries
+PERCENTILES = (50.0, 90.0, 99.0, 99.9, 99.99)
+
+
+class LatencyHistogram:
+    """
+    Log-bucketed latency histogram with a bounded relative error, in the style of HdrHistogram
+
+    Latencies are counted in units of resolution. Values below 2^precision_bits units get a bucket each, above
+    that every power of two is split in 2^(precision_bits-1) buckets, so a bucket is never wider than
+    2^(1-precision_bits) times its values. Recording is O(1), only the non empty range of buckets is stored, and
+    histograms with the same resolution and precision can be merged, e.g. across replications and workers.
+
+    Attributes
+    ----------
+    resolution : float
+        Smallest latency told apart, in time units
+    precision_bits : int
+        Number of bits of the sub-buckets
+    count : int
+        Number of recorded latencies
+    total : float
+        Sum of the recorded latencies
+    min, max : float
+        Exact extremes of the recorded latencies, None if empty
+    """
+
+    def __init__(self, resolution=1e-3, precision_bits=8):
+        """
+        Parameters
+        ----------
+        resolution : float
+            Smallest latency told apart, in time units
+        precision_bits : int
+            Number of bits of the sub-buckets, 8 keeps the relative error below 0.8 %
+        """
+
+        self.resolution = resolution
+        self.precision_bits = precision_bits
+        self.__sub_buckets = 1 << precision_bits
+        self.__half = self.__sub_buckets >> 1
+        self.__units = 1. / resolution
+        self.reset()
+
+    def reset(self):
+        """ Forget all the recorded latencies """
+
+        self.counts = []
+        self.offset = 0
+        self.count = 0
+        self.total = 0.0
+        self.min = None
+        self.max = None
+
+    def record(self, latency, count=1):
+        """ Record a latency, count times """
+
+        self.__record_index(self.__get_index(int(latency * self.__units)), count)
+        self.count += count
+        self.total += latency * count
+        if self.min is None or latency < self.min:
+            self.min = latency
+        if self.max is None or latency > self.max:
+            self.max = latency
+
+    def merge(self, other):
+        """ Add the counts of another histogram with the same resolution and precision """
+
+        if (other.resolution, other.precision_bits) != (self.resolution, self.precision_bits):
+            raise ValueError("Cannot merge histograms of different resolution or precision")
+        if other.count == 0:
+            return
+        for position, count in enumerate(other.counts):
+            if count:
+                self.__record_index(other.offset + position, count)
+        self.count += other.count
+        self.total += other.total
+        self.min = other.min if self.min is None else min(self.min, other.min)
+        self.max = other.max if self.max is None else max(self.max, other.max)
+
+    def get_mean(self):
+        return self.total / self.count if self.count else float('nan')
+
+    def get_percentile(self, percentile):
+        """
+        Latency below which the given percentage of the recorded latencies are, as the upper edge of its bucket
+        capped by the maximum, nan if empty
+        """
+
+        if self.count == 0:
+            return float('nan')
+        rank = max(1, int(math.ceil(percentile / 100. * self.count)))
+        cumulative = 0
+        for position, count in enumerate(self.counts):
+            cumulative += count
+            if cumulative >= rank:
+                return min(self.__get_upper(self.offset + position) / self.__units, self.max)
+        return self.max
+
+    def get_percentiles(self, percentiles=PERCENTILES):
+        """ Returns a dict of the latency at every percentile """
+        return dict((percentile, self.get_percentile(percentile)) for percentile in percentiles)
+
+    def to_dict(self):
+        """ Compact, JSON serializable form of the histogram, see from_dict """
+        return {'resolution': self.resolution,
+                'precision_bits': self.precision_bits,
+                'offset': self.offset,
+                'counts': list(self.counts),
+                'count': self.count,
+                'total': self.total,
+                'min': self.min,
+                'max': self.max}
+
+    @classmethod
+    def from_dict(cls, data):
+        histogram = cls(data['resolution'], data['precision_bits'])
+        histogram.offset = data['offset']
+        histogram.counts = list(data['counts'])
+        histogram.count = data['count']
+        histogram.total = data['total']
+        histogram.min = data['min']
+        histogram.max = data['max']
+        return histogram
+
+    @classmethod
+    def merge_all(cls, histograms):
+        """ Merge a list of histograms, or of their dict forms, into a new histogram """
+
+        merged = None
+        for histogram in histograms:
+            if isinstance(histogram, dict):
+                histogram = cls.from_dict(histogram)
+            if merged is None:
+                merged = cls(histogram.resolution, histogram.precision_bits)
+            merged.merge(histogram)
+        return merged if merged is not None else cls()
+
+    def __record_index(self, index, count):
+        if not self.counts:
+            self.offset = index
+            self.counts.append(0)
+        elif index < self.offset:
+            self.counts[:0] = [0] * (self.offset - index)
+            self.offset = index
+        elif index >= self.offset + len(self.counts):
+            self.counts.extend([0] * (index - self.offset - len(self.counts) + 1))
+        self.counts[index - self.offset] += count
+
+    def __get_index(self, value):
+        if value < self.__sub_buckets:
+            return max(value, 0)
+        shift = value.bit_length() - self.precision_bits
+        return shift * self.__half + (value >> shift)
+
+    def __get_upper(self, index):
+        # Exclusive upper edge of a bucket, in units of resolution
+        if index < self.__sub_buckets:
+            return index + 1
+        shift = index // self.__half - 1
+        return ((index - shift * self.__half) + 1) << shift
@@ -0,0 +1,116 @@
+import json
+import time
+
+
+class Profiler:
+    """
+    Per-handler counters and timers of a simulation run
+
+    Simulation wraps its event handler and its scheduler functions with time_events and time_calls when
+    profiling is enabled. When it is not, nothing is wrapped and the run loop is left untouched, so profiling
+    costs nothing unless it is switched on.
+
+    Attributes
+    ----------
+    events : dict
+        Per event type name: count, total and max handler time in seconds
+    calls : dict
+        Per scheduler name: count, total and max time per call in seconds
+    heap_high : int
+        High-water mark of the event queue size
+    queue_high : dict
+        Per slice name: high-water mark of the number of queued requests
+    wall_time : float
+        Wall time of the run loop
+    """
+
+    def __init__(self, event_names, get_heap_size, get_queue_depths):
+        """
+        Parameters
+        ----------
+        event_names : dict
+            Name of every event type
+        get_heap_size : function
+            Returns the current size of the event queue
+        get_queue_depths : function
+            Returns a dict of the current number of queued requests per slice name
+        """
+
+        self.event_names = event_names
+        self.events = {}
+        self.calls = {}
+        self.heap_high = 0
+        self.queue_high = {}
+        self.wall_time = 0.0
+        self.__get_heap_size = get_heap_size
+        self.__get_queue_depths = get_queue_depths
+        self.__start = None
+
+    def start(self):
+        self.__start = time.perf_counter()
+
+    def stop(self):
+        self.wall_time += time.perf_counter() - self.__start
+
+    def time_events(self, handler):
+        """ Wraps an event handler to count and time its calls per event type, and track the queue sizes """
+
+        def timed(event):
+            start = time.perf_counter()
+            handler(event)
+            elapsed = time.perf_counter() - start
+            self.__add(self.events, self.event_names.get(event.type, event.type), elapsed)
+            heap_size = self.__get_heap_size()
+            if heap_size > self.heap_high:
+                self.heap_high = heap_size
+            for name, depth in self.__get_queue_depths().items():
+                if depth > self.queue_high.get(name, 0):
+                    self.queue_high[name] = depth
+        return timed
+
+    def time_calls(self, name, function):
+        """ Wraps a function to count and time its calls under the given name """
+
+        def timed(*args):
+            start = time.perf_counter()
+            result = function(*args)
+            self.__add(self.calls, name, time.perf_counter() - start)
+            return result
+        return timed
+
+    def get_summary(self):
+        """
+        Returns
+        -------
+        dict
+            The counters and timers, with the total number of events and the events per second of the run loop
+        """
+
+        no_events = sum(counter['count'] for counter in self.events.values())
+        return {'wall_time': self.wall_time,
+                'no_events': no_events,
+                'events_per_sec': no_events / self.wall_time if self.wall_time > 0 else 0.0,
+                'events': self.events,
+                'calls': self.calls,
+                'heap_high': self.heap_high,
+                'queue_high': self.queue_high}
+
+    def save(self, path, scenario=None):
+        """ Append the summary, with the scenario of the run, as one JSON line """
+
+        summary = self.get_summary()
+        if scenario is not None:
+            summary['scenario'] = scenario
+        with open(path, 'a') as file:
+            file.write(json.dumps(summary) + '\n')
+
+    @staticmethod
+    def __add(counters, name, elapsed):
+        counter = counters.get(name)
+        if counter is None:
+            counters[name] = {'count': 1, 'total': elapsed, 'max': elapsed}
+            return
+        counter['count'] += 1
+        counter['total'] += elapsed
+        if elapsed > counter['max']:
+            counter['max'] = elapsed
@@ -0,0 +1,39 @@
+import numpy as np
+
+
+class RandomStreams:
+    """
+    Independent NumPy random generators for the parts of a simulation, spawned from one SeedSequence
+
+    Every part draws from its own stream, so the arrivals of a slice do not depend on how many variates the
+    scheduler, the PHY-MAC delay or the sampling consumed. Runs with the same seed and different strategies
+    therefore see the same arrivals (common random numbers), and runs with different seeds are independent.
+
+    Attributes
+    ----------
+    urllc_arrivals : numpy.random.Generator
+        Arrivals and initial offsets of the URLLC slice
+    mmtc_arrivals : numpy.random.Generator
+        Arrivals and initial offsets of the mMTC slice
+    delay : numpy.random.Generator
+        Delay between PHY and MAC of the reports and decisions
+    sampling : numpy.random.Generator
+        Offset of the waiting time samples in Trace
+    """
+
+    # The order of the streams is part of the seeding, only append new streams at the end
+    NAMES = ('urllc_arrivals', 'mmtc_arrivals', 'delay', 'sampling')
+
+    def __init__(self, seed):
+        """
+        Parameters
+        ----------
+        seed : int or numpy.random.SeedSequence
+            Root seed of the run
+        """
+
+        if not isinstance(seed, np.random.SeedSequence):
+            seed = np.random.SeedSequence(seed)
+        self.seed = seed
+        for name, child in zip(self.NAMES, seed.spawn(len(self.NAMES))):
+            setattr(self, name, np.random.Generator(np.random.PCG64(child)))
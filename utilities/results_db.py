@@ -0,0 +1,161 @@
+import json
+import os
+import sqlite3
+import time
+
+RESULTS_DB = 'results/results.db'
+
+# Columns of a run, in the order of the table
+SCENARIO = ('s1', 's2', 'reliability', 'deadline', 'mu', 'no_urllc', 'no_mmtc')
+COLUMNS = SCENARIO + ('seed',
+                      'urllc_wait_mean', 'urllc_wait_var', 'urllc_wait_low', 'urllc_wait_high',
+                      'mmtc_wait_mean', 'mmtc_wait_var', 'mmtc_wait_low', 'mmtc_wait_high',
+                      'urllc_loss', 'mmtc_loss', 'waste', 'warmup_time', 'end_time',
+                      'urllc_histogram', 'mmtc_histogram', 'created')
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    s1 TEXT, s2 TEXT, reliability TEXT, deadline TEXT, mu REAL, no_urllc INTEGER, no_mmtc INTEGER, seed INTEGER,
+    urllc_wait_mean REAL, urllc_wait_var REAL, urllc_wait_low REAL, urllc_wait_high REAL,
+    mmtc_wait_mean REAL, mmtc_wait_var REAL, mmtc_wait_low REAL, mmtc_wait_high REAL,
+    urllc_loss REAL, mmtc_loss REAL, waste REAL, warmup_time REAL, end_time REAL,
+    urllc_histogram TEXT, mmtc_histogram TEXT, created REAL
+);
+CREATE INDEX IF NOT EXISTS runs_scenario ON runs (s1, s2, reliability, deadline, mu, no_urllc, no_mmtc, seed);
+"""
+
+
+def _to_float(value):
+    return None if value is None else float(value)
+
+
+class ResultsDB:
+    """
+    SQLite store of the summaries of the simulation runs
+
+    Every run is one row of the table runs, indexed on the scenario and the seed. Inserts are buffered and
+    written in one transaction per batch, so a sweep should keep a single ResultsDB open in the process that
+    collects the summaries. SQLite locks the file, other processes writing to it wait for their turn.
+
+    Attributes
+    ----------
+    path : str
+        Path of the database file
+    batch_size : int
+        Number of buffered runs written at once
+    """
+
+    def __init__(self, path=RESULTS_DB, batch_size=100, timeout=60.):
+        """
+        Parameters
+        ----------
+        path : str
+            Path of the database file, created with its directory if missing
+        batch_size : int
+            Number of buffered runs written at once, 1 to write every run immediately
+        timeout : float
+            Seconds to wait for a lock held by another process
+        """
+
+        self.path = path
+        self.batch_size = batch_size
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.__connection = sqlite3.connect(path, timeout=timeout)
+        self.__connection.row_factory = sqlite3.Row
+        self.__connection.executescript(_SCHEMA)
+        self.__pending = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def insert(self, summary):
+        """
+        Buffer one run
+
+        Parameters
+        ----------
+        summary : dict
+            Summary from Simulation.get_summary, with the seed of the run if known
+        """
+
+        urllc_wait = summary['urllc_wait']
+        mmtc_wait = summary['mmtc_wait']
+        row = ([summary[key] for key in SCENARIO[:4]]
+               + [float(summary['mu']), int(summary['no_urllc']), int(summary['no_mmtc']), summary.get('seed')]
+               + [_to_float(value) for value in urllc_wait]
+               + [_to_float(value) for value in mmtc_wait]
+               + [_to_float(summary['urllc_loss']), _to_float(summary['mmtc_loss']), _to_float(summary['waste']),
+                  _to_float(summary.get('warmup_time')), _to_float(summary.get('end_time'))]
+               + [json.dumps(summary[key]) if summary.get(key) is not None else None
+                  for key in ('urllc_histogram', 'mmtc_histogram')]
+               + [time.time()])
+        self.__pending.append(row)
+        if len(self.__pending) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        """ Write the buffered runs """
+
+        if not self.__pending:
+            return
+        with self.__connection:
+            self.__connection.executemany("INSERT INTO runs ({}) VALUES ({})".format(
+                ', '.join(COLUMNS), ', '.join('?' * len(COLUMNS))), self.__pending)
+        self.__pending = []
+
+    def close(self):
+        self.flush()
+        self.__connection.close()
+
+    def get_runs(self, limit=None, **filters):
+        """
+        Runs matching the filters, newest first
+
+        Parameters
+        ----------
+        limit : int
+            Maximum number of runs returned, all by default
+        filters :
+            Column values the runs must have, e.g. s1='FCFS', no_urllc=120
+
+        Returns
+        -------
+        list
+            One dict per run, keyed by column. The histograms are decoded dicts, see LatencyHistogram.from_dict
+        """
+
+        query = "SELECT * FROM runs" + self.__where(filters) + " ORDER BY id DESC"
+        parameters = list(filters.values())
+        if limit is not None:
+            query += " LIMIT ?"
+            parameters.append(int(limit))
+        runs = []
+        for row in self.__connection.execute(query, parameters):
+            run = dict(row)
+            for key in ('urllc_histogram', 'mmtc_histogram'):
+                if run[key] is not None:
+                    run[key] = json.loads(run[key])
+            runs.append(run)
+        return runs
+
+    def get_scenarios(self, **filters):
+        """ Distinct scenarios of the runs matching the filters, as dicts keyed by SCENARIO """
+
+        query = "SELECT DISTINCT {} FROM runs{} ORDER BY {}".format(
+            ', '.join(SCENARIO), self.__where(filters), ', '.join(SCENARIO))
+        return [dict(row) for row in self.__connection.execute(query, list(filters.values()))]
+
+    @staticmethod
+    def __where(filters):
+        for key in filters:
+            if key not in COLUMNS:
+                raise ValueError("Unknown column: {}".format(key))
+        if not filters:
+            return ""
+        return " WHERE " + " AND ".join("{} = ?".format(key) for key in filters)
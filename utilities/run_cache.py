@@ -0,0 +1,155 @@
+"""
+Content-addressed cache of simulation runs
+
+A run is identified by the SHA-256 of its fully resolved scenario: the merged configuration, the node
+configuration, the strategies, traffic, node counts, mu and seed, and the version of the simulator code. The
+summary of a run, and optionally its trace file, are stored under that key, so a sweep only computes the points
+it has never computed with the current code.
+"""
+
+import hashlib
+import json
+import os
+import pickle
+import shutil
+import tempfile
+from nodes.node import load_node_config
+
+# Bump to invalidate all the cached runs, e.g. after a change outside of the hashed sources that alters results
+CACHE_VERSION = 1
+
+# Sources of the simulator, any change to them invalidates the cached runs
+_SOURCES = ('simulation.py', 'events', 'nodes', 'schedulers', 'slices', 'utilities')
+_POINT_KEYS = ('s1', 's2', 'reliability', 'deadline', 'no_urllc', 'no_mmtc', 'mu', 'seed')
+# Settings that only change how a run is logged, profiled or stored, not its results, left out of the key
+_IGNORED_CONFIG_KEYS = ('log_levels', 'log_ring_size', 'profiling', 'trace_background', 'trace_format', 'run_cache')
+
+_code_version = None
+
+
+def get_code_version(root=None):
+    """
+    Hash of the simulator sources and their configuration files, computed once per process
+
+    Returns
+    -------
+    str
+        Hex digest changing whenever a .py or .json file of the simulator changes
+    """
+    global _code_version
+    if _code_version is not None and root is None:
+        return _code_version
+    root = root if root is not None else os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    digest = hashlib.sha256(str(CACHE_VERSION).encode())
+    paths = []
+    for source in _SOURCES:
+        path = os.path.join(root, source)
+        if os.path.isfile(path):
+            paths.append(path)
+            continue
+        for directory, _, files in os.walk(path):
+            paths += [os.path.join(directory, name) for name in files if name.endswith(('.py', '.json'))]
+    for path in sorted(paths):
+        digest.update(os.path.relpath(path, root).encode())
+        with open(path, 'rb') as file:
+            digest.update(file.read())
+    _code_version = digest.hexdigest()
+    return _code_version
+
+
+class RunCache:
+    """
+    Summaries and traces of simulation runs on disk, keyed by get_key
+
+    Entries are written to a temporary file first and renamed, so concurrent writers never leave a partial
+    entry behind.
+
+    Attributes
+    ----------
+    directory : str
+        Root directory of the cache
+    """
+
+    def __init__(self, directory='cache'):
+        self.directory = directory
+
+    def get_key(self, config, point):
+        """
+        Key of a run
+
+        Parameters
+        ----------
+        config : dict
+            Configuration of the run, before the overrides of the point
+        point : dict
+            s1, s2, reliability, deadline, no_urllc, no_mmtc, mu and seed of the run, and an optional 'config'
+            dict of overrides, as the sweep points
+
+        Returns
+        -------
+        str
+            Hex digest of the resolved scenario and the code version, the settings of _IGNORED_CONFIG_KEYS
+            are left out
+        """
+
+        resolved = dict(config)
+        resolved.update(point.get('config', {}))
+        for key in _IGNORED_CONFIG_KEYS:
+            resolved.pop(key, None)
+        scenario = {'config': resolved,
+                    'node_config': load_node_config(),
+                    'point': dict((key, point.get(key)) for key in _POINT_KEYS),
+                    'code': get_code_version()}
+        encoded = json.dumps(scenario, sort_keys=True, default=str)
+        return hashlib.sha256(encoded.encode()).hexdigest()
+
+    def __contains__(self, key):
+        return os.path.exists(self.__get_path(key, '.pkl'))
+
+    def get(self, key):
+        """ Cached summary of a run, None if missing """
+
+        try:
+            with open(self.__get_path(key, '.pkl'), 'rb') as file:
+                return pickle.load(file)
+        except (OSError, EOFError, pickle.UnpicklingError):
+            return None
+
+    def get_trace(self, key):
+        """ Path of the cached trace file of a run, None if missing """
+
+        for extension in ('.trace', '.csv'):
+            path = self.__get_path(key, extension)
+            if os.path.exists(path):
+                return path
+        return None
+
+    def put(self, key, summary, trace_file_path=None):
+        """
+        Store the summary of a run, and a copy of its trace file if given
+        """
+
+        self.__write(key, '.pkl', lambda file: pickle.dump(summary, file, pickle.HIGHEST_PROTOCOL))
+        if trace_file_path is not None:
+            extension = os.path.splitext(trace_file_path)[1]
+            with open(trace_file_path, 'rb') as source:
+                self.__write(key, extension, lambda file: shutil.copyfileobj(source, file))
+
+    def clear(self):
+        """ Drop all the cached runs """
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def __get_path(self, key, extension):
+        return os.path.join(self.directory, key[:2], key + extension)
+
+    def __write(self, key, extension, write):
+        path = self.__get_path(key, extension)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        descriptor, temporary = tempfile.mkstemp(dir=os.path.dirname(path))
+        try:
+            with os.fdopen(descriptor, 'wb') as file:
+                write(file)
+            os.replace(temporary, path)
+        except BaseException:
+            os.remove(temporary)
+            raise
@@ -14,14 +14,17 @@ class Stats:
         Parameters
         ----------
         stats_file_path : str
-            Path to stats file
+            Path to stats file, None to keep the stats in memory only
         log_file_path : str
             Path to logging file
         """
-        try:
-            self.__stats_file = open(stats_file_path, 'a')
-        except FileNotFoundError:
-            self.__stats_file = open(stats_file_path, 'w+')
+        if stats_file_path is None:
+            self.__stats_file = None
+        else:
+            try:
+                self.__stats_file = open(stats_file_path, 'a')
+            except FileNotFoundError:
+                self.__stats_file = open(stats_file_path, 'w+')
 
         # Write the headers to the csv files
 
@@ -50,7 +53,8 @@ class Stats:
         stats_str = stats_str[:-1]
         stats_str += '\n'
 
-        self.__stats_file.write(stats_str)
+        if self.__stats_file is not None:
+            self.__stats_file.write(stats_str)
 
     def clear_stats(self):
         """ Clear the stats for the current simulation """
@@ -62,6 +66,7 @@ class Stats:
     def close(self):
         """ Close stats and log file """
 
-        self.__stats_file.close()
+        if self.__stats_file is not None:
+            self.__stats_file.close()
 
 
@@ -0,0 +1,96 @@
+import math
+import scipy.stats as st
+
+
+class StreamingEstimator:
+    """
+    Constant memory estimator of the waiting time and loss rate of one slice, fed one packet at a time
+
+    It reproduces the estimator Trace computes from the whole run: the waiting time of every sampling-th served
+    packet from a random offset is used as a sample, and the samples are accumulated with Welford's running mean
+    and variance, so only a few counters are kept however long the run is.
+
+    Attributes
+    ----------
+    sampling : int
+        Sampling interval of the waiting time samples
+    offset : int
+        Index of the first served packet used as a sample
+    no_packets : int
+        Number of packets added
+    no_lost : int
+        Number of packets that expired without a pilot
+    no_samples : int
+        Number of waiting time samples
+    """
+
+    def __init__(self, sampling, offset):
+        """
+        Parameters
+        ----------
+        sampling : int
+            Sampling interval of the waiting time samples
+        offset : int
+            Index of the first served packet used as a sample, in [0, sampling)
+        """
+
+        self.sampling = sampling
+        self.offset = offset
+        self.no_packets = 0
+        self.no_lost = 0
+        self.no_samples = 0
+        self.__no_served = 0
+        self.__mean = 0.0
+        self.__square_sum = 0.0
+
+    def add(self, wait, served):
+        """
+        Add one packet
+
+        Parameters
+        ----------
+        wait : float
+            Time between arrival and departure of the packet
+        served : bool
+            Whether the packet got a pilot
+        """
+
+        self.no_packets += 1
+        if not served:
+            self.no_lost += 1
+            return
+        index = self.__no_served - self.offset
+        self.__no_served += 1
+        if index < 0 or index % self.sampling != 0:
+            return
+        self.no_samples += 1
+        delta = wait - self.__mean
+        self.__mean += delta / self.no_samples
+        self.__square_sum += delta * (wait - self.__mean)
+
+    def get_wait(self):
+        """
+        Returns
+        -------
+        tuple
+            (mean, variance, lower, upper) of the waiting time samples, with the 95 % t confidence interval of
+            the mean
+        """
+
+        if self.no_samples == 0:
+            return float('nan'), float('nan'), float('nan'), float('nan')
+        var_wait = self.__square_sum / self.no_samples
+        if var_wait > 0.0:
+            con_interval = st.t.interval(0.95, self.no_samples - 1, loc=self.__mean, scale=self.get_sem())
+        else:
+            con_interval = (self.__mean, self.__mean)
+        return self.__mean, var_wait, con_interval[0], con_interval[1]
+
+    def get_sem(self):
+        """ Standard error of the mean waiting time, nan with less than two samples """
+        if self.no_samples < 2:
+            return float('nan')
+        return math.sqrt(self.__square_sum / (self.no_samples - 1) / self.no_samples)
+
+    def get_loss(self):
+        return self.no_lost / self.no_packets
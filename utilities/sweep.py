@@ -0,0 +1,304 @@
+"""
+In-process parallel sweep engine
+
+Runs Simulation objects directly in a pool of long-lived worker processes. Every worker imports NumPy, SciPy and
+the simulator once and gets the parsed configuration once, then runs one sweep point after the other and returns
+its summary statistics to the parent over the pool's pipe. The parent is the only process writing results.
+"""
+
+import multiprocessing
+import os
+import queue
+import time
+import numpy as np
+import scipy.stats as st
+from utilities.stats import Stats
+from utilities.trace import Trace, next_prime
+from utilities.random_streams import RandomStreams
+from simulation import Simulation
+
+_config = None
+
+# Per run estimates a replication controller waits on to converge
+METRICS = ('urllc_wait', 'mmtc_wait', 'urllc_loss', 'mmtc_loss')
+
+
+def _init_worker(config):
+    global _config
+    _config = config
+
+
+def spawn_seeds(seed, no_seeds):
+    """
+    Independent seeds for a number of replications, spawned from one root seed with a NumPy SeedSequence
+
+    Points that only differ by their strategies should share a seed, they then see the same arrivals (common
+    random numbers, see RandomStreams).
+
+    Returns
+    -------
+    list
+        One int per replication, each can be passed to main.py --seed to reproduce a run on its own
+    """
+    return [int(child.generate_state(1)[0]) for child in np.random.SeedSequence(seed).spawn(no_seeds)]
+
+
+def run_point(point, config=None):
+    """
+    Run the simulation of one sweep point in the current process
+
+    Parameters
+    ----------
+    point : dict
+        s1, s2, reliability, deadline, no_urllc, no_mmtc, mu and seed of the run. An optional 'config' dict
+        overrides entries of the configuration
+    config : dict
+        Configuration, defaults to the one given to the worker
+
+    Returns
+    -------
+    dict
+        The summary from Simulation.get_summary, with the seed, the final stats and the wall time of the run
+    """
+    config = dict(_config if config is None else config)
+    config.update(point.get('config', {}))
+    start = time.perf_counter()
+    streams = RandomStreams(point['seed'])
+    stats = Stats(None)
+    trace = Trace(None, next_prime(point['no_urllc']), rng=streams.sampling,
+                  streaming=config.get('trace_streaming', False))
+    simulation = Simulation(config, stats, trace, point['no_urllc'], point['no_mmtc'], point['mu'],
+                            point['s1'], point['s2'], (point['reliability'], point['deadline']), streams)
+    simulation.run()
+    trace.process()
+    summary = simulation.get_summary()
+    summary['seed'] = point['seed']
+    summary['stats'] = dict(stats.stats)
+    summary['wall_time'] = time.perf_counter() - start
+    return summary
+
+
+def get_metrics(summary):
+    """ Returns the per run estimate of every metric in METRICS from a summary """
+    return {'urllc_wait': summary['urllc_wait'][0],
+            'mmtc_wait': summary['mmtc_wait'][0],
+            'urllc_loss': summary['urllc_loss'],
+            'mmtc_loss': summary['mmtc_loss']}
+
+
+def half_width(values, confidence=0.95):
+    """ Half-width of the t confidence interval of the mean of values, inf with less than two values """
+    if len(values) < 2:
+        return float('inf')
+    return st.t.ppf(0.5 + confidence / 2, len(values) - 1) * st.sem(values)
+
+
+def _run_point_safe(point):
+    # A failing point is reported back instead of tearing down the whole sweep
+    try:
+        return point, run_point(point), None
+    except Exception as error:
+        return point, None, repr(error)
+
+
+class Sweep:
+    """
+    Parallel sweep over simulation points
+
+    Attributes
+    ----------
+    config : dict
+        Configuration shared by all the points
+    processes : int
+        Number of worker processes, all the cores by default
+    runs_per_minute : float
+        Throughput of the last call to run
+    failures : list
+        (point, error) of the points that raised in the last call to run or replicate
+    converged : bool
+        Whether the last call to replicate reached the target precision within its budget
+    half_widths : dict
+        Confidence interval half-width of every metric at the end of the last call to replicate
+    cache : RunCache
+        Cache of the computed points, None to compute every point
+    """
+
+    def __init__(self, config, processes=None, cache=None):
+        self.config = config
+        self.processes = processes if processes is not None else os.cpu_count()
+        self.cache = cache
+        self.runs_per_minute = 0.0
+        self.failures = []
+        self.converged = False
+        self.half_widths = {}
+
+    def run(self, points, callback=None):
+        """
+        Run all the points and collect their summaries, in completion order
+
+        Points found in the cache are returned first without running them, with 'cached' set in their summary.
+
+        Parameters
+        ----------
+        points : list
+            Sweep points, see run_point
+        callback : function
+            Called in the parent process with every summary as soon as it arrives, e.g. to save it
+
+        Returns
+        -------
+        list
+            The summaries of the points that completed
+        """
+
+        summaries = []
+        self.failures = []
+        start = time.perf_counter()
+        pending = []
+        for point in points:
+            summary = self.__get_cached(point)
+            if summary is None:
+                pending.append(point)
+                continue
+            summaries.append(summary)
+            if callback is not None:
+                callback(summary)
+        with multiprocessing.Pool(self.processes, initializer=_init_worker, initargs=(self.config,)) as pool:
+            for point, summary, error in pool.imap_unordered(_run_point_safe, pending):
+                if error is not None:
+                    self.failures.append((point, error))
+                    continue
+                self.__put_cached(point, summary)
+                summaries.append(summary)
+                if callback is not None:
+                    callback(summary)
+        elapsed = time.perf_counter() - start
+        self.runs_per_minute = 60 * len(summaries) / elapsed if elapsed > 0 else 0.0
+        return summaries
+
+    def replicate(self, point, precision, max_replications=40, min_replications=3, confidence=0.95,
+                  callback=None, timeout=None):
+        """
+        Run replications of one point until the confidence intervals of all the METRICS are narrow enough
+
+        Replications get independent seeds spawned from the seed of the point and run in parallel. After each
+        completed replication the stopping rule is checked on the longest prefix of completed replications, in
+        seed order, so fast runs do not bias the estimate. As soon as the half-width of every metric is below
+        precision times its mean, or max_replications have completed, the outstanding workers are terminated.
+
+        Parameters
+        ----------
+        point : dict
+            Sweep point, see run_point
+        precision : float
+            Target relative half-width, e.g. 0.05 for +-5 %
+        max_replications : int
+            Budget of replications
+        min_replications : int
+            Number of replications before the stopping rule is checked
+        confidence : float
+            Confidence level of the intervals
+        callback : function
+            Called in the parent process with the summary of every replication that is used
+        timeout : float
+            Seconds to wait for the next replication to complete, no limit if None. A worker killed by the OS,
+            e.g. out of memory, never reports back, so without a timeout its replication is waited for forever.
+            On a timeout the outstanding replications are recorded as failures and the controller stops
+
+        Returns
+        -------
+        list
+            The summaries of the replications the estimate is based on, in seed order
+        """
+
+        seeds = spawn_seeds(point['seed'], max_replications)
+        results = [None] * max_replications
+        replications = [None] * max_replications
+        done = queue.Queue()
+        self.failures = []
+        self.converged = False
+        self.half_widths = dict((metric, float('inf')) for metric in METRICS)
+        prefix = []
+        start = time.perf_counter()
+
+        pool = multiprocessing.Pool(self.processes, initializer=_init_worker, initargs=(self.config,))
+        try:
+            def submit(index):
+                replication = dict(point, seed=seeds[index])
+                replications[index] = replication
+                summary = self.__get_cached(replication)
+                if summary is not None:
+                    done.put((index, (replication, summary, None)))
+                    return
+                # The error callback gets the exceptions raised outside of _run_point_safe, e.g. pickling errors
+                pool.apply_async(_run_point_safe, (replication,),
+                                 callback=lambda result: done.put((index, result)),
+                                 error_callback=lambda error: done.put((index, (replication, None, repr(error)))))
+
+            submitted = min(self.processes, max_replications)
+            for index in range(submitted):
+                submit(index)
+            completed = 0
+            while completed < submitted:
+                try:
+                    index, (replication, result, error) = done.get(timeout=timeout)
+                except queue.Empty:
+                    for index in range(submitted):
+                        if results[index] is None:
+                            error = "no result after {} s, the worker may have died".format(timeout)
+                            self.failures.append((replications[index], error))
+                    break
+                completed += 1
+                if error is not None:
+                    self.failures.append((replication, error))
+                    results[index] = error
+                else:
+                    if not result.get('cached'):
+                        self.__put_cached(replication, result)
+                    results[index] = result
+
+                # Longest prefix of completed replications, in seed order
+                used = []
+                for result in results:
+                    if result is None:
+                        break
+                    if isinstance(result, dict):
+                        used.append(result)
+                for result in used[len(prefix):]:
+                    if callback is not None:
+                        callback(result)
+                prefix = used
+
+                if len(prefix) >= min_replications:
+                    metrics = [get_metrics(summary) for summary in prefix]
+                    self.converged = True
+                    for metric in METRICS:
+                        values = [value[metric] for value in metrics]
+                        self.half_widths[metric] = half_width(values, confidence)
+                        if not self.half_widths[metric] <= precision * abs(np.mean(values)):
+                            self.converged = False
+                    if self.converged:
+                        break
+                if submitted < max_replications:
+                    submit(submitted)
+                    submitted += 1
+        finally:
+            # Stop the outstanding replications at once
+            pool.terminate()
+            pool.join()
+
+        elapsed = time.perf_counter() - start
+        self.runs_per_minute = 60 * completed / elapsed if elapsed > 0 else 0.0
+        return prefix
+
+    def __get_cached(self, point):
+        if self.cache is None:
+            return None
+        summary = self.cache.get(self.cache.get_key(self.config, point))
+        if summary is not None:
+            summary['cached'] = True
+        return summary
+
+    def __put_cached(self, point, summary):
+        if self.cache is not None:
+            self.cache.put(self.cache.get_key(self.config, point), summary)
@@ -1,88 +1,235 @@
 import numpy as np
 import scipy.stats as st
+from utilities.trace_buffer import TraceBuffer
+from utilities.streaming_estimator import StreamingEstimator
+from utilities.latency_histogram import LatencyHistogram, PERCENTILES
+from utilities.trace_file import TraceWriter, TraceReader
+
+
+def isprime(N):
+    if N<=1 or N==4:
+        return False
+    else:
+        for i in range(2, N//2):
+            if N%i == 0:
+                return False
+        return True
+
+
+def next_prime(N):
+    """ Smallest prime >= N, used as the sampling interval of the waiting time samples """
+    while not isprime(N):
+        N += 1
+    return N
 
 
 class Trace:
     _URLLC_ARRIVAL = 6
     _mMTC_ARRIVAL = 7
 
-    def __init__(self, trace_file_path, sampling, log=False):
+    def __init__(self, trace_file_path, sampling, log=False, rng=None, streaming=False, trace_format='csv',
+                 header=None, background=False):
         self.log = log
+        # Random generator of the sample offset, the global np.random state if None
+        self.rng = rng
+        # In streaming mode the packets are not kept, the statistics are accumulated as they are traced
+        self.streaming = streaming
+        self.__trace_writer = None
         if log is True:
-            self.__trace_file = open(trace_file_path, 'w+')
-            self.__trace_file.write('Event,Node,Counter,Arrival,Dead,Departure,Pilot\n')
-        else:
-            self.__trace_file = None
+            # The records are written in chunks, by a writer thread if background, see utilities.trace_file
+            self.__trace_writer = TraceWriter(trace_file_path, header, trace_format=trace_format,
+                                              background=background)
         self.keys = ['event_type', 'node_id', 'counter', 'arrival_time', 'dead_time', 'departure_time', 'pilot']
-        self.Dict = dict((key, []) for key in self.keys)
+        self.buffer = TraceBuffer()
+        # Where process() reads the records from, a TraceBuffer or a TraceReader
+        self.source = self.buffer
         self.plot_path = None
         self.urllc = {}
         self.mmtc = {}
         self.sampling = sampling
+        self.estimators = {}
+        if streaming:
+            self.estimators = {self._URLLC_ARRIVAL: StreamingEstimator(sampling, self.__draw_offset()),
+                               self._mMTC_ARRIVAL: StreamingEstimator(sampling, self.__draw_offset())}
+        # Waiting time histograms of the served packets of every slice, for the tail percentiles
+        self.histograms = {self._URLLC_ARRIVAL: LatencyHistogram(), self._mMTC_ARRIVAL: LatencyHistogram()}
+        # Packets arriving before the end of the warm-up are left out of the statistics
+        self.__warmup_time = 0.0
+        # Only with online warm-up detection, see track_warmup
+        self.__tracking = False
+        self.__held = False
+        self.__pending = None
+        self.__no_held = 0
+        self.max_held = None
+        self.__frame_wait = 0.0
+        self.__frame_served = 0
+
+    @property
+    def warmup_time(self):
+        return self.__warmup_time
+
+    @warmup_time.setter
+    def warmup_time(self, warmup_time):
+        # The streaming estimators and the histograms cannot drop packets once added, set the warm-up time before
+        # the run or while tracking the warm-up, when the packets are held back until it is known
+        self.__warmup_time = warmup_time
+        self.__release_pending()
+
+    def track_warmup(self, max_held=None):
+        """
+        Prepare for an online warm-up detection: accumulate the per-frame waiting time read by pop_frame_wait,
+        and hold the packets back from the streaming estimators and the histograms until the warm-up time is set.
+        They then get the packets arriving after the warm-up, like process(). If it is never set, they get all the
+        packets once the statistics are read.
+
+        Parameters
+        ----------
+        max_held : int
+            Number of held back packets from which held_full is set, the caller should then set the warm-up
+            time to bound the memory used, no limit if None
+        """
+        self.__tracking = True
+        self.__held = True
+        self.max_held = max_held
+        if self.streaming:
+            # The buffer is not filled in streaming mode, the held back packets are kept apart
+            self.__pending = TraceBuffer()
+
+    @property
+    def held_full(self):
+        """ Whether max_held packets are held back waiting for the warm-up time """
+        return self.__held and self.max_held is not None and self.__no_held >= self.max_held
+
+    @classmethod
+    def from_file(cls, trace_file_path, sampling=None, rng=None):
+        """
+        Trace whose statistics are computed from a binary trace file, memory-mapped instead of loaded
+
+        The sampling interval defaults to the one of the run, from the number of URLLC nodes in the header.
+        """
+        source = TraceReader(trace_file_path)
+        if sampling is None:
+            sampling = next_prime(source.header.get('no_urllc', 1))
+        trace = cls(None, sampling, rng=rng)
+        trace.source = source
+        return trace
 
     def close(self):
-        if self.log is True:
-            self.__trace_file.close()
-        else:
-            pass
+        if self.__trace_writer is not None:
+            self.__trace_writer.close()
+        if isinstance(self.source, TraceReader):
+            self.source.close()
 
     def write_trace(self, entry):
-        if self.log is True:
-            self.__trace_file.write(str(entry[self.keys[0]]) + ',' + str(entry[self.keys[1]]) + ','
-                                    + str(entry[self.keys[2]]) + ',' + str(entry[self.keys[3]]) + ','
-                                    + str(entry[self.keys[4]]) + ',' + str(entry[self.keys[5]]) + ','
-                                    + str(entry[self.keys[6]]) + '\n')
+        if self.__trace_writer is not None:
+            self.__trace_writer.write(entry)
+
+        if not self.streaming:
+            self.buffer.append(entry)
+        wait = entry['departure_time'] - entry['arrival_time']
+        if self.__tracking and entry['pilot']:
+            self.__frame_wait += wait
+            self.__frame_served += 1
+        if self.__held:
+            # The statistics get the packet once the warm-up time is known, from the buffer or the pending packets
+            self.__no_held += 1
+            if self.__pending is not None:
+                self.__pending.append(entry)
+        elif entry['arrival_time'] >= self.__warmup_time:
+            self.__add(entry['event_type'], wait, entry['pilot'])
+
+    def pop_frame_wait(self):
+        """ Mean waiting time of the packets served since the last call, None if there were none """
+        if self.__frame_served == 0:
+            return None
+        wait = self.__frame_wait / self.__frame_served
+        self.__frame_wait = 0.0
+        self.__frame_served = 0
+        return wait
 
-        for i in range(len(entry)):
-            k = self.keys[i]
-            self.Dict[k] = np.append(self.Dict[k], entry[k])
+    def count_samples(self, since):
+        """ Number of packets traced so far that arrived at or after the given time """
+        if self.streaming:
+            # The estimators only get the packets arriving after the warm-up time
+            self.__release_pending()
+            return sum(estimator.no_packets for estimator in self.estimators.values())
+        return int(np.count_nonzero(self.buffer.get_column('arrival_time') >= since))
 
     def process(self):
+        # The warm-up time is final once the statistics are computed
+        self.__release_pending()
+        if self.streaming:
+            return
         keys = ['arrival_time', 'dead_time', 'departure_time', 'pilot']
-        self.urllc = dict((key, []) for key in keys)
-        self.mmtc = dict((key, []) for key in keys)
-        event_type = self.Dict['event_type']
-        arrivals = self.Dict[keys[0]]
-        dead = self.Dict[keys[1]]
-        departure = self.Dict[keys[2]]
-        pilots = self.Dict[keys[3]]
-        for i in range(np.size(event_type)):
-            if event_type[i] == self._URLLC_ARRIVAL:
-                self.urllc[keys[0]] = np.append(self.urllc[keys[0]], arrivals[i])
-                self.urllc[keys[1]] = np.append(self.urllc[keys[1]], dead[i])
-                self.urllc[keys[2]] = np.append(self.urllc[keys[2]], departure[i])
-                self.urllc[keys[3]] = np.append(self.urllc[keys[3]], pilots[i])
-            elif event_type[i] == self._mMTC_ARRIVAL:
-                self.mmtc[keys[0]] = np.append(self.mmtc[keys[0]], arrivals[i])
-                self.mmtc[keys[1]] = np.append(self.mmtc[keys[1]], dead[i])
-                self.mmtc[keys[2]] = np.append(self.mmtc[keys[2]], departure[i])
-                self.mmtc[keys[3]] = np.append(self.mmtc[keys[3]], pilots[i])
+        columns = self.source.get_columns()
+        event_type = columns['event_type']
+        steady = columns['arrival_time'] >= self.warmup_time
+        urllc_mask = (event_type == self._URLLC_ARRIVAL) & steady
+        mmtc_mask = (event_type == self._mMTC_ARRIVAL) & steady
+        self.urllc = dict((key, columns[key][urllc_mask]) for key in keys)
+        self.mmtc = dict((key, columns[key][mmtc_mask]) for key in keys)
 
     def get_waiting_time(self):
+        if self.streaming:
+            self.__release_pending()
+            urllc_wait = self.estimators[self._URLLC_ARRIVAL].get_wait()
+            mmtc = self.estimators[self._mMTC_ARRIVAL]
+            avg_wait, _, lower, upper = mmtc.get_wait()
+            # Same as __get_mmtc_wait, which reports the standard error as the variance
+            return urllc_wait, (avg_wait, mmtc.get_sem(), lower, upper)
         urllc_wait = self.__get_urllc_wait()
         mmtc_wait = self.__get_mmtc_wait()
         return urllc_wait, mmtc_wait
 
+    def get_percentiles(self, percentiles=PERCENTILES):
+        """ Waiting time of the served URLLC and mMTC packets at the given percentiles, as two dicts """
+        self.__release_pending()
+        return (self.histograms[self._URLLC_ARRIVAL].get_percentiles(percentiles),
+                self.histograms[self._mMTC_ARRIVAL].get_percentiles(percentiles))
+
     def get_loss_rate(self):
+        if self.streaming:
+            self.__release_pending()
+            return self.estimators[self._URLLC_ARRIVAL].get_loss(), self.estimators[self._mMTC_ARRIVAL].get_loss()
         urllc_loss = self.__get_urllc_loss()
         mmtc_loss = self.__get_mmtc_loss()
         return urllc_loss, mmtc_loss
 
-    def __get_urllc_wait(self):
-        arrival_time = self.urllc['arrival_time']
-        departure_time = self.urllc['departure_time']
-        pilots = self.urllc['pilot']
-        print(len(pilots))
-        wait_time = np.array(departure_time) - np.array(arrival_time)
+    def __sample_wait(self, packets):
+        # Waiting time of the served packets, every sampling-th one from a random offset to decorrelate them
+        served = packets['pilot'].astype(bool)
+        wait_time = packets['departure_time'][served] - packets['arrival_time'][served]
+        return wait_time[self.__draw_offset()::self.sampling]
 
-        for ind in range(len(pilots)):
-            if not pilots[ind]:
-                np.delete(wait_time, ind)
+    def __add(self, event_type, wait, pilot):
+        # Feed a packet arriving after the warm-up to the streaming estimators and the histograms
+        if self.streaming:
+            self.estimators[event_type].add(wait, pilot)
+        if pilot:
+            self.histograms[event_type].record(wait)
 
-        init_ind = np.random.randint(self.sampling)
-        samples = np.array([])
-        for ind in range(init_ind, len(wait_time), self.sampling):
-            samples = np.append(samples, wait_time[ind])
+    def __release_pending(self):
+        # Feed the packets held back while tracking the warm-up, with the arrival time filter of process()
+        if not self.__held:
+            return
+        self.__held = False
+        self.__no_held = 0
+        source = self.__pending if self.__pending is not None else self.buffer
+        self.__pending = None
+        columns = source.get_columns()
+        steady = columns['arrival_time'] >= self.__warmup_time
+        wait = columns['departure_time'][steady] - columns['arrival_time'][steady]
+        for event_type, packet_wait, pilot in zip(columns['event_type'][steady].tolist(), wait.tolist(),
+                                                  columns['pilot'][steady].tolist()):
+            self.__add(event_type, packet_wait, pilot)
+
+    def __draw_offset(self):
+        if self.rng is None:
+            return np.random.randint(self.sampling)
+        return int(self.rng.integers(self.sampling))
+
+    def __get_urllc_wait(self):
+        samples = self.__sample_wait(self.urllc)
         # print("urllc sample length {}".format(len(samples)))
 
         avg_wait = np.mean(samples)
@@ -97,33 +244,14 @@ class Trace:
 
     def __get_urllc_loss(self):
         pilots = self.urllc['pilot']
-        print(len(pilots))
-        loss_counter = 0
-        for ind in range(len(pilots)):
-            if not pilots[ind]:
-                loss_counter += 1
-        return loss_counter/len(pilots)
+        return int(np.count_nonzero(pilots == 0)) / len(pilots)
 
     def __get_mmtc_loss(self):
         pilots = self.mmtc['pilot']
-        loss_counter = 0
-        for ind in range(len(pilots)):
-            if not pilots[ind]:
-                loss_counter += 1
-        return loss_counter / len(pilots)
+        return int(np.count_nonzero(pilots == 0)) / len(pilots)
 
     def __get_mmtc_wait(self):
-        arrival_time = self.mmtc['arrival_time']
-        departure_time = self.mmtc['departure_time']
-        pilots = self.mmtc['pilot']
-        wait_time = np.array(departure_time) - np.array(arrival_time)
-        for ind in range(len(pilots)):
-            if not pilots[ind]:
-                np.delete(wait_time, ind)
-        init_ind = np.random.randint(self.sampling)
-        samples = np.array([])
-        for ind in range(init_ind, len(wait_time), self.sampling):
-            samples = np.append(samples, wait_time[ind])
+        samples = self.__sample_wait(self.mmtc)
         # print("mmtc sample length {}".format(len(samples)))
         avg_wait = np.mean(samples)
         var_wait = st.sem(samples)
@@ -134,10 +262,16 @@ class Trace:
         return avg_wait, var_wait, con_interval[0], con_interval[1]
 
     def print_results(self):
+        urllc_wait, mmtc_wait = self.get_waiting_time()
+        urllc_loss, mmtc_loss = self.get_loss_rate()
+        if self.streaming:
+            no_urllc = self.estimators[self._URLLC_ARRIVAL].no_packets
+            no_mmtc = self.estimators[self._mMTC_ARRIVAL].no_packets
+        else:
+            no_urllc = len(self.urllc['pilot'])
+            no_mmtc = len(self.mmtc['pilot'])
         print("------------------------------------------------------")
         print("      | Total Arrivals | Packet loss | Avg_wait_time |")
-        print("URLLC | {}           |{}          |{}|"
-              .format(len(self.urllc['pilot']), self.__get_urllc_loss(), self.__get_urllc_wait()))
-        print("mMTC  | {}          |{}|{}|"
-              .format(len(self.mmtc['pilot']), self.__get_mmtc_loss(), self.__get_mmtc_wait()))
+        print("URLLC | {}           |{}          |{}|".format(no_urllc, urllc_loss, urllc_wait))
+        print("mMTC  | {}          |{}|{}|".format(no_mmtc, mmtc_loss, mmtc_wait))
         print("-------------------------------------------------------")
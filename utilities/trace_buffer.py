@@ -0,0 +1,86 @@
+import numpy as np
+
+
+class TraceBuffer:
+    """
+    Growable columnar store for the packet trace records
+
+    Every column is a preallocated typed NumPy array. When the buffer is full the capacity is doubled, so
+    appending a record costs amortized O(1) and never copies the recorded rows one by one.
+
+    Attributes
+    ----------
+    COLUMNS : tuple
+        Pairs of (key, dtype) describing the record layout, in the order of the trace file header
+    size : int
+        Number of records currently stored
+    """
+
+    COLUMNS = (('event_type', np.int8),
+               ('node_id', np.int64),
+               ('counter', np.int64),
+               ('arrival_time', np.float64),
+               ('dead_time', np.float64),
+               ('departure_time', np.float64),
+               ('pilot', np.bool_))
+
+    def __init__(self, capacity=4096):
+        """
+        Initialize an empty trace buffer
+
+        Parameters
+        ----------
+        capacity : int
+            Number of records allocated up front
+        """
+
+        self.size = 0
+        self.__capacity = max(int(capacity), 1)
+        self.__columns = dict((key, np.empty(self.__capacity, dtype=dtype)) for key, dtype in self.COLUMNS)
+
+    def __len__(self):
+        return self.size
+
+    def append(self, entry):
+        """
+        Append one record
+
+        Parameters
+        ----------
+        entry : dict
+            Trace record keyed by the column names in COLUMNS
+        """
+
+        if self.size == self.__capacity:
+            self.__grow()
+        ind = self.size
+        for key, column in self.__columns.items():
+            column[ind] = entry[key]
+        self.size = ind + 1
+
+    def get_column(self, key):
+        """
+        Returns a zero-copy view of the recorded part of one column
+        """
+
+        return self.__columns[key][:self.size]
+
+    def get_columns(self):
+        """
+        Returns a dict of zero-copy views of all the columns
+        """
+
+        return dict((key, column[:self.size]) for key, column in self.__columns.items())
+
+    def clear(self):
+        """ Drop all the records but keep the allocated capacity """
+
+        self.size = 0
+
+    def __grow(self):
+        # Double the capacity, copying the recorded rows once per column
+        self.__capacity *= 2
+        for key, dtype in self.COLUMNS:
+            column = np.empty(self.__capacity, dtype=dtype)
+            column[:self.size] = self.__columns[key][:self.size]
+            self.__columns[key] = column
@@ -0,0 +1,206 @@
+"""
+Trace files
+
+A trace file starts with the 8 byte magic MAGIC, the length of the header as a little endian uint32 and a JSON
+header holding the scenario and the record layout, padded to a multiple of 64 bytes. Fixed-width little endian
+records with the columns of TraceBuffer follow until the end of the file, so the number of records is given by
+the file size and a file cut short by a crash is still readable up to its last complete record.
+"""
+
+import json
+import os
+import queue
+import threading
+import numpy as np
+from utilities.trace_buffer import TraceBuffer
+
+MAGIC = b'SLTRACE1'
+_ALIGNMENT = 64
+
+RECORD_DTYPE = np.dtype([(key, np.dtype(dtype).newbyteorder('<')) for key, dtype in TraceBuffer.COLUMNS])
+
+
+class TraceWriter:
+    """
+    Writes trace records to a trace file in chunks, optionally from a background thread
+
+    Records are appended to an in-memory chunk. A full chunk is either written at once, or handed to a writer
+    thread through a bounded queue, which formats and writes it while the simulation fills the next chunk. When
+    the writer falls behind the queue fills up and the simulation blocks until a chunk is written, so the memory
+    used stays bounded.
+
+    Attributes
+    ----------
+    path : str
+        Path of the trace file
+    trace_format : str
+        'binary', see the module description, or 'csv', one text line per record
+    size : int
+        Number of records written, including the ones not flushed yet
+    """
+
+    def __init__(self, path, header=None, chunk_size=65536, trace_format='binary', background=False, queue_size=4):
+        """
+        Parameters
+        ----------
+        path : str
+            Path of the trace file, overwritten if it exists
+        header : dict
+            JSON serializable description of the scenario, e.g. the configuration and the command line arguments,
+            only written in binary files
+        chunk_size : int
+            Number of records kept in memory between two writes
+        trace_format : str
+            'binary' or 'csv'
+        background : bool
+            Whether the chunks are formatted and written by a writer thread
+        queue_size : int
+            Number of full chunks waiting for the writer thread before write blocks
+        """
+
+        if trace_format not in ('binary', 'csv'):
+            raise ValueError("Unknown trace format: {}".format(trace_format))
+        self.path = path
+        self.trace_format = trace_format
+        self.size = 0
+        self.__chunk_size = chunk_size
+        self.__chunk = TraceBuffer(chunk_size)
+        self.__error = None
+        if trace_format == 'binary':
+            self.__file = open(path, 'wb')
+            header = dict(header if header is not None else {})
+            header['columns'] = RECORD_DTYPE.descr
+            encoded = json.dumps(header).encode()
+            padding = -(len(MAGIC) + 4 + len(encoded)) % _ALIGNMENT
+            encoded += b' ' * padding
+            self.__file.write(MAGIC + np.uint32(len(encoded)).astype('<u4').tobytes() + encoded)
+        else:
+            self.__file = open(path, 'w+')
+            self.__file.write('Event,Node,Counter,Arrival,Dead,Departure,Pilot\n')
+        if background:
+            self.__queue = queue.Queue(queue_size)
+            self.__thread = threading.Thread(target=self.__run, name='trace-writer', daemon=True)
+            self.__thread.start()
+        else:
+            self.__queue = None
+            self.__thread = None
+
+    def write(self, entry):
+        """ Append one record, a dict keyed by the columns of TraceBuffer """
+
+        self.__chunk.append(entry)
+        self.size += 1
+        if len(self.__chunk) == self.__chunk_size:
+            self.__hand_off()
+
+    def flush(self):
+        """ Write the buffered records to the file, and wait for the writer thread to write them """
+
+        if len(self.__chunk) > 0:
+            self.__hand_off()
+        if self.__queue is not None:
+            self.__queue.join()
+        self.__check()
+        self.__file.flush()
+
+    def close(self):
+        """ Flush the records, then stop the writer thread and close the file even if the flush raised """
+
+        try:
+            self.flush()
+        finally:
+            if self.__thread is not None:
+                # The thread keeps consuming the chunks after an error, so the queue has room for the sentinel
+                self.__queue.put(None)
+                self.__thread.join()
+                self.__thread = None
+            self.__file.close()
+
+    def __hand_off(self):
+        chunk = self.__chunk
+        if self.__queue is None:
+            self.__write_chunk(chunk)
+            chunk.clear()
+            return
+        self.__check()
+        # Blocks while the queue is full, the writer thread owns the chunk from now on
+        self.__queue.put(chunk)
+        self.__chunk = TraceBuffer(self.__chunk_size)
+
+    def __check(self):
+        # Errors of the writer thread are raised in the simulation thread
+        if self.__error is not None:
+            error, self.__error = self.__error, None
+            raise error
+
+    def __run(self):
+        while True:
+            chunk = self.__queue.get()
+            try:
+                if chunk is None:
+                    return
+                if self.__error is None:
+                    self.__write_chunk(chunk)
+            except Exception as error:
+                self.__error = error
+            finally:
+                self.__queue.task_done()
+
+    def __write_chunk(self, chunk):
+        columns = chunk.get_columns()
+        if self.trace_format == 'binary':
+            records = np.empty(len(chunk), dtype=RECORD_DTYPE)
+            for key, column in columns.items():
+                records[key] = column
+            records.tofile(self.__file)
+        else:
+            rows = zip(*(columns[key].tolist() for key, _ in TraceBuffer.COLUMNS))
+            self.__file.write(''.join(','.join(map(str, row)) + '\n' for row in rows))
+
+
+class TraceReader:
+    """
+    Memory-mapped reader of a binary trace file
+
+    The records are mapped read-only, the columns are NumPy views on the mapping, so opening a trace costs the
+    same whatever its size and the data is only read from disk when it is used.
+
+    Attributes
+    ----------
+    path : str
+        Path of the trace file
+    header : dict
+        Header of the file, the scenario and the record layout under 'columns'
+    records : numpy.memmap
+        The records, as a structured array
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as file:
+            magic = file.read(len(MAGIC))
+            if magic != MAGIC:
+                raise ValueError("{} is not a binary trace file".format(path))
+            header_length = int(np.frombuffer(file.read(4), dtype='<u4')[0])
+            self.header = json.loads(file.read(header_length).decode())
+        offset = len(MAGIC) + 4 + header_length
+        no_records = (os.path.getsize(path) - offset) // RECORD_DTYPE.itemsize
+        if no_records > 0:
+            self.records = np.memmap(path, dtype=RECORD_DTYPE, mode='r', offset=offset, shape=(no_records,))
+        else:
+            self.records = np.empty(0, dtype=RECORD_DTYPE)
+
+    def __len__(self):
+        return len(self.records)
+
+    def close(self):
+        """ Drop the mapping, it is unmapped once the columns returned before are released too """
+        self.records = np.empty(0, dtype=RECORD_DTYPE)
+
+    def get_column(self, key):
+        """ Returns a zero-copy view of one column """
+        return self.records[key]
+
+    def get_columns(self):
+        """ Returns a dict of zero-copy views of all the columns, as TraceBuffer.get_columns """
+        return dict((key, self.records[key]) for key, _ in TraceBuffer.COLUMNS)
@@ -0,0 +1,118 @@
+import numpy as np
+
+
+def mser(series, batch_size=5):
+    """
+    MSER-m truncation point of a series (MSER-5 by default)
+
+    The series is averaged in batches of batch_size. For every candidate number of truncated batches d up to
+    half of the batches, MSER(d) = sum((Y_i - mean(Y_d..))^2 for i >= d) / (n - d)^2 is computed with suffix
+    sums, and the d minimizing it is the end of the warm-up.
+
+    Parameters
+    ----------
+    series : array_like
+        Observations in time order
+    batch_size : int
+        Number of observations per batch
+
+    Returns
+    -------
+    tuple
+        (truncation, at_limit): number of observations to truncate, and whether the minimum was found at the
+        limit of half the batches, in which case the series is too short to trust the truncation point
+    """
+
+    no_batches = len(series) // batch_size
+    if no_batches < 2:
+        return 0, True
+    batches = np.asarray(series[:no_batches * batch_size], dtype=float).reshape(no_batches, batch_size).mean(axis=1)
+    remaining = np.arange(no_batches, 0, -1)
+    suffix_sum = np.cumsum(batches[::-1])[::-1]
+    suffix_square = np.cumsum(batches[::-1] ** 2)[::-1]
+    statistic = (suffix_square - suffix_sum ** 2 / remaining) / remaining ** 2
+    limit = no_batches // 2
+    truncated = int(np.argmin(statistic[:limit + 1]))
+    return truncated * batch_size, truncated == limit
+
+
+class WarmupDetector:
+    """
+    Online warm-up detection over per-frame observation series with MSER-5
+
+    The simulation reports one observation per series and frame. Every check_interval frames the MSER-5
+    truncation point of every series is computed, and the warm-up ends at the latest of them. The detection is
+    final once no series has its minimum at the half-length limit.
+
+    Attributes
+    ----------
+    times : list
+        Time of every frame
+    series : dict
+        Observations of every series, one per frame
+    warmup_time : float
+        End of the detected warm-up, None until detected
+    """
+
+    def __init__(self, check_interval=200, batch_size=5):
+        """
+        Parameters
+        ----------
+        check_interval : int
+            Number of frames between two detection attempts, also the minimum number of frames observed
+        batch_size : int
+            Batch size of MSER
+        """
+
+        self.check_interval = check_interval
+        self.batch_size = batch_size
+        self.times = []
+        self.series = {}
+        self.warmup_time = None
+
+    def observe(self, time, **observations):
+        """
+        Record the observations of one frame, and attempt a detection every check_interval frames
+
+        Returns
+        -------
+        bool
+            Whether the warm-up has been detected
+        """
+
+        if self.warmup_time is not None:
+            return True
+        self.times.append(time)
+        for name, value in observations.items():
+            self.series.setdefault(name, []).append(value)
+        if len(self.times) % self.check_interval == 0:
+            self.__detect()
+        return self.warmup_time is not None
+
+    def force(self):
+        """
+        End the detection with the truncation points of the series observed so far, even if they are at the
+        half-length limit, e.g. when the statistics cannot wait any longer
+
+        Returns
+        -------
+        float
+            End of the warm-up
+        """
+
+        if self.warmup_time is None:
+            self.__detect(True)
+        return self.warmup_time
+
+    def __detect(self, force=False):
+        truncation = 0
+        for values in self.series.values():
+            series_truncation, at_limit = mser(values, self.batch_size)
+            if at_limit and not force:
+                return
+            truncation = max(truncation, series_truncation)
+        # The truncated frames end with the observation before the truncation point
+        self.warmup_time = self.times[truncation - 1] if truncation > 0 else 0.0
+        # The observations are not needed anymore
+        self.series = {}
+        self.times = []